@@ -7,14 +7,33 @@ Handles manga generation requests.
 """
 
 import os
+import re
 import sys
 import json
 import uuid
+import time
+import logging
 import asyncio
+import bisect
+import operator
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property, lru_cache
+from io import BytesIO
+from itertools import repeat
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from types import MappingProxyType
+from typing import Optional, List, Dict, Any, Deque
+from urllib.parse import quote_from_bytes
 from datetime import datetime
 
+import aiofiles
+import httpx
+import orjson
+
+logger = logging.getLogger(__name__)
+
 # Add project root to path for imports
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
@@ -33,11 +52,22 @@ except ImportError:
     print("⚠️ python-dotenv not installed. Run: pip install python-dotenv")
     print("   Using system environment variables only")
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Header
+# Server-side LLM keys, read once (per-request BYOK keys still take priority)
+_ENV_GROQ_KEY = os.environ.get("GROQ_API_KEY")
+_ENV_NVIDIA_KEY = os.environ.get("NVIDIA_API_KEY")
+_ENV_GEMINI_KEY = os.environ.get("GEMINI_API_KEY")
+
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+
+from src.ai.llm_factory import get_llm as _create_llm
+from src.ai.story_director import StoryDirector
+from src.database.mongodb import Database
+from src.database.redis_store import RedisJobStore
+from scripts.generate_manga import MangaGenerator, MangaConfig
 
 
 # ============================================
@@ -75,6 +105,13 @@ class StepStatus(BaseModel):
     duration: Optional[str] = None
 
 
+# Max lines kept in a job's terminal log
+LOG_BUFFER_SIZE = 500
+
+# Emitted once per panel - %-format is cheaper than an f-string in this hot path
+_PANEL_LOG_TMPL = "🖼️ Generated panel %d (%d%%)"
+
+
 class JobStatus(BaseModel):
     job_id: str
     status: str  # "pending", "generating", "completed", "failed"
@@ -86,11 +123,22 @@ class JobStatus(BaseModel):
     current_panel: Optional[int] = None
     total_panels: Optional[int] = None
     panel_previews: Optional[List[str]] = None  # URLs of generated panels
-    log_messages: Optional[List[str]] = None  # Terminal-style log
+    log_messages: Optional[Deque[str]] = None  # Terminal-style log (bounded)
     layout: Optional[str] = None
     
     result: Optional[dict] = None
     error: Optional[str] = None
+    
+    @field_validator("log_messages")
+    @classmethod
+    def _bound_log(cls, v):
+        # Long generations emit hundreds of lines; keep only the recent tail
+        return deque(v, maxlen=LOG_BUFFER_SIZE) if v is not None else None
+    
+    @cached_property
+    def output_dir(self) -> Path:
+        """This job's folder under outputs/ (built once per job object)."""
+        return OUTPUT_DIR / self.job_id
 
 
 # ============================================
@@ -100,7 +148,8 @@ class JobStatus(BaseModel):
 app = FastAPI(
     title="MangaGen API",
     description="AI-powered manga generation",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse  # orjson encodes project/job payloads in C
 )
 
 # Include auth routes
@@ -116,13 +165,148 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Job storage (in-memory for now, use Redis in production)
-jobs: dict[str, JobStatus] = {}
+class _JobTable(OrderedDict):
+    """
+    In-memory job table, capped at MAX_JOBS entries.
+    
+    When full, the oldest finished jobs are archived to MongoDB and dropped;
+    get_job() still finds them there. Running jobs are never evicted.
+    """
+    
+    MAX_JOBS = 2000
+    
+    def __setitem__(self, job_id: str, job: JobStatus):
+        super().__setitem__(job_id, job)
+        self.move_to_end(job_id)
+        if len(self) > self.MAX_JOBS:
+            self._evict()
+    
+    def _evict(self):
+        # Evict down to 90% so a full table doesn't rescan on every insert
+        excess = len(self) - self.MAX_JOBS * 9 // 10
+        finished = [
+            job_id for job_id, job in self.items()
+            if job.status in ("completed", "failed")
+        ][:excess]
+        for job_id in finished:
+            job = self.pop(job_id)
+            if Database.db is not None:
+                _schedule_db_write(
+                    Database.archive_job_status(job_id, job.model_dump(mode="json")),
+                    f"archive job {job_id}"
+                )
+
+
+# Job storage (in-memory, mirrored to Redis when available)
+jobs: "_JobTable[str, JobStatus]" = _JobTable()
 
 # Output directory
 OUTPUT_DIR = Path("outputs")
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# One FallbackLLM per process - building it probes every provider's API key
+get_llm = lru_cache(maxsize=1)(_create_llm)
+
+# Shared outbound HTTP client - keeps TCP/TLS connections alive between requests
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Lazily create the pooled HTTP client (HTTP/2 when h2 is installed)."""
+    global _http_client
+    if _http_client is None:
+        limits = httpx.Limits(max_keepalive_connections=64, max_connections=128, keepalive_expiry=60)
+        try:
+            _http_client = httpx.AsyncClient(timeout=90.0, http2=True, limits=limits)
+        except ImportError:
+            _http_client = httpx.AsyncClient(timeout=90.0, limits=limits)
+    return _http_client
+
+# Write-behind MongoDB updates still in flight (drained on shutdown)
+_pending_writes: set = set()
+_mongo_write_semaphore = asyncio.Semaphore(4)
+
+
+def _schedule_db_write(coro, description: str) -> asyncio.Task:
+    """Run a MongoDB write in the background, bounded and with failures logged."""
+    async def _run():
+        async with _mongo_write_semaphore:
+            try:
+                await coro
+            except Exception as e:
+                print(f"⚠️ Background DB write failed ({description}): {e}")
+    
+    task = asyncio.create_task(_run())
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+    return task
+
+
+async def get_job(job_id: str) -> Optional[JobStatus]:
+    """Get a job from this worker's memory, falling back to Redis, then the MongoDB archive."""
+    job = jobs.get(job_id)
+    if job is None:
+        raw = await RedisJobStore.get(job_id)
+        if raw:
+            job = JobStatus.model_validate_json(raw)
+    if job is None:
+        # Finished jobs evicted from the in-memory table are archived here
+        archived = await Database.get_archived_job_status(job_id)
+        if archived:
+            job = JobStatus.model_validate(archived)
+    return job
+
+
+async def publish_job(job: JobStatus):
+    """Mirror a job's status to Redis so other workers can serve it."""
+    if RedisJobStore.client is None:
+        return
+    try:
+        await RedisJobStore.set(job.job_id, job.model_dump_json())
+    except Exception as e:
+        print(f"⚠️ Failed to publish job {job.job_id}: {e}")
+
+
+@app.on_event("startup")
+async def connect_database():
+    """Connect MongoDB once; handlers fall back to memory/files if it's unavailable."""
+    await Database.connect_db()
+
+
+@app.on_event("shutdown")
+async def close_database():
+    """Close the MongoDB connection."""
+    await Database.close_db()
+
+
+async def get_db():
+    """FastAPI dependency: the shared Motor database, or None in in-memory mode."""
+    return Database.db
+
+
+@app.on_event("startup")
+async def connect_job_store():
+    """Connect the shared job store (no-op unless REDIS_URL is set)."""
+    await RedisJobStore.connect()
+
+
+@app.on_event("shutdown")
+async def drain_pending_writes():
+    """Let queued write-behind updates finish before the server exits."""
+    if _pending_writes:
+        print(f"⏳ Waiting for {len(_pending_writes)} pending DB writes...")
+        await asyncio.gather(*_pending_writes, return_exceptions=True)
+    await RedisJobStore.close()
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close pooled outbound connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 # ============================================
 # API Endpoints
@@ -152,7 +336,6 @@ async def enhance_prompt(request: EnhanceRequest):
     """Use AI to improve a story prompt."""
     
     try:
-        from src.ai.story_director import StoryDirector
         director = StoryDirector()  # Uses FallbackLLM automatically!
         enhanced = director.enhance_prompt(request.prompt)
         return EnhanceResponse(original=request.prompt, enhanced=enhanced)
@@ -223,6 +406,7 @@ async def start_generation(
         layout=request.layout
     )
     jobs[job_id] = job
+    job.output_dir.mkdir(exist_ok=True)
     
     # Start background generation
     background_tasks.add_task(
@@ -237,9 +421,10 @@ async def start_generation(
 
 @app.get("/api/status/{job_id}", response_model=JobStatus)
 async def get_status(job_id: str):
-    """Get job status - checks memory first, then local saved files."""
-    if job_id in jobs:
-        return jobs[job_id]
+    """Get job status - checks memory/Redis first, then local saved files."""
+    job = await get_job(job_id)
+    if job is not None:
+        return job
     
     # Fallback: Try to load from local saved project files
     output_dir = Path("outputs") / job_id
@@ -500,300 +685,15 @@ async def get_pdf_direct(job_id: str):
     
     raise HTTPException(status_code=404, detail="No PDF found for this project")
 
-@app.get("/api/download/{job_id}/{file_type}")
-async def download_file(job_id: str, file_type: str, dialogues: Optional[str] = None):
-    """Download generated manga file with optional dialogue bubble rendering."""
-    from pathlib import Path
-    
-    output_dir = Path("outputs") / job_id
-    
-    # V4: Fallback chain - check memory, then filesystem
-    job = jobs.get(job_id)
-    result = None
-    
-    if job and job.result:
-        result = job.result
-    elif output_dir.exists():
-        # Fallback: load from filesystem if server reloaded
-        page_files = sorted(output_dir.glob("manga_page_*.png"))
-        if page_files:
-            result = {
-                "pages": [
-                    {
-                        "page_number": i + 1,
-                        "page_image": str(pf),
-                        "panels": []
-                    }
-                    for i, pf in enumerate(page_files)
-                ]
-            }
-    
-    if not result:
-        raise HTTPException(status_code=404, detail="Job not found or no output files")
-    
-    # For PDF with dialogues - render bubbles onto images
-    if file_type == "pdf" and dialogues:
-        try:
-            import json
-            from PIL import Image, ImageDraw, ImageFont
-            import io
-            import tempfile
-            
-            dialogue_data = json.loads(dialogues)
-            pages = result.get("pages", [])
-            
-            if not pages:
-                raise HTTPException(status_code=404, detail="No pages to export")
-            
-            # Process each page and render bubbles
-            rendered_pages = []
-            output_dir = Path("outputs") / job_id
-            
-            for page_info in pages:
-                page_num = page_info.get("page_number", 1)
-                page_path = page_info.get("page_image")
-                
-                if not page_path or not Path(page_path).exists():
-                    continue
-                
-                # Load page image
-                img = Image.open(page_path).convert("RGBA")
-                draw = ImageDraw.Draw(img)
-                
-                # Parse layout to get grid (default 2x2)
-                layout = result.get("layout", "2x2") or "2x2"
-                parts = layout.split("x")
-                cols = int(parts[0]) if len(parts) >= 1 else 2
-                rows = int(parts[1]) if len(parts) >= 2 else 2
-                
-                # Calculate panel dimensions on the page
-                # Typical manga page: has title area at top, margins around panels
-                title_height = int(img.height * 0.05)  # Title takes ~5% of height
-                margin = int(img.width * 0.02)  # Small margin
-                gutter = int(img.width * 0.01)  # Gap between panels
-                
-                content_width = img.width - (2 * margin) - ((cols - 1) * gutter)
-                content_height = img.height - title_height - (2 * margin) - ((rows - 1) * gutter)
-                
-                panel_width = content_width // cols
-                panel_height = content_height // rows
-                
-                # Get dialogues for each panel on this page
-                for panel_idx in range(cols * rows):
-                    panel_key = f"page-{page_num}-panel-{panel_idx}"
-                    panel_bubbles = dialogue_data.get(panel_key, [])
-                    
-                    if not panel_bubbles:
-                        continue
-                    
-                    # Calculate panel position on page
-                    panel_col = panel_idx % cols
-                    panel_row = panel_idx // cols
-                    
-                    panel_x = margin + panel_col * (panel_width + gutter)
-                    panel_y = title_height + margin + panel_row * (panel_height + gutter)
-                    
-                    for bubble in panel_bubbles:
-                        # Calculate bubble position within panel (x/y are percentages within panel)
-                        x_pct = bubble.get("x", 10) / 100
-                        y_pct = bubble.get("y", 10) / 100
-                        
-                        # Position relative to panel, not whole page
-                        bubble_x = int(panel_x + x_pct * panel_width)
-                        bubble_y = int(panel_y + y_pct * panel_height)
-                        
-                        text = bubble.get("text", "")
-                        style = bubble.get("style", "speech")
-                        font_size = bubble.get("fontSize", 11)
-                        
-                        if not text:
-                            continue
-                        
-                        # Try to load a font
-                        try:
-                            font = ImageFont.truetype("arial.ttf", font_size * 2)  # Scale up for image
-                        except:
-                            try:
-                                font = ImageFont.truetype("C:/Windows/Fonts/arial.ttf", font_size * 2)
-                            except:
-                                font = ImageFont.load_default()
-                        
-                        # Word wrap text to fit in bubble (max ~20 chars per line for manga)
-                        words = text.split()
-                        lines = []
-                        current_line = ""
-                        for word in words:
-                            test_line = f"{current_line} {word}".strip()
-                            if len(test_line) > 25:
-                                if current_line:
-                                    lines.append(current_line)
-                                current_line = word
-                            else:
-                                current_line = test_line
-                        if current_line:
-                            lines.append(current_line)
-                        
-                        wrapped_text = "\n".join(lines)
-                        
-                        # Calculate text bbox
-                        bbox = draw.textbbox((0, 0), wrapped_text, font=font)
-                        text_width = bbox[2] - bbox[0]
-                        text_height = bbox[3] - bbox[1]
-                        
-                        # Bubble padding
-                        padding = 10
-                        bubble_width = text_width + padding * 2
-                        bubble_height = text_height + padding * 2
-                        
-                        # Clamp bubble to stay within panel
-                        bubble_x = max(panel_x, min(bubble_x, panel_x + panel_width - bubble_width))
-                        bubble_y = max(panel_y, min(bubble_y, panel_y + panel_height - bubble_height))
-                        
-                        # Draw bubble background based on style (JJK-style matching canvas!)
-                        if style == "thought":
-                            # Cloud-like thought bubble - draw overlapping circles
-                            cx = bubble_x + bubble_width // 2
-                            cy = bubble_y + bubble_height // 2
-                            # Main ellipse
-                            draw.ellipse([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
-                                        fill="white", outline="gray", width=2)
-                            # Cloud bumps around edges
-                            bump_size = min(bubble_width, bubble_height) // 4
-                            for angle in [0, 45, 90, 135, 180, 225, 270, 315]:
-                                import math
-                                bx = cx + int((bubble_width//2 - bump_size//2) * math.cos(math.radians(angle)))
-                                by = cy + int((bubble_height//2 - bump_size//2) * math.sin(math.radians(angle)))
-                                draw.ellipse([bx - bump_size//2, by - bump_size//2, 
-                                            bx + bump_size//2, by + bump_size//2], 
-                                            fill="white", outline="gray", width=1)
-                            # Small thought bubbles below
-                            draw.ellipse([bubble_x + 5, bubble_y + bubble_height + 3, 
-                                         bubble_x + 12, bubble_y + bubble_height + 10], fill="white", outline="gray", width=1)
-                            draw.ellipse([bubble_x, bubble_y + bubble_height + 12, 
-                                         bubble_x + 6, bubble_y + bubble_height + 18], fill="white", outline="gray", width=1)
-                            
-                        elif style == "shout":
-                            # JJK-style spiky/jagged polygon
-                            # Create jagged edge points
-                            points = []
-                            spikes = 12  # Number of spikes
-                            for i in range(spikes):
-                                angle = (360 / spikes) * i
-                                import math
-                                # Alternate between outer and inner radius for spikes
-                                if i % 2 == 0:
-                                    r_x = bubble_width // 2 + 8  # Outer spike
-                                    r_y = bubble_height // 2 + 8
-                                else:
-                                    r_x = bubble_width // 2 - 5  # Inner notch
-                                    r_y = bubble_height // 2 - 5
-                                cx = bubble_x + bubble_width // 2
-                                cy = bubble_y + bubble_height // 2
-                                px = cx + int(r_x * math.cos(math.radians(angle - 90)))
-                                py = cy + int(r_y * math.sin(math.radians(angle - 90)))
-                                points.append((px, py))
-                            draw.polygon(points, fill="white", outline="black", width=3)
-                            
-                        elif style == "narrator":
-                            # Caption box - dark gradient-like with left accent
-                            draw.rectangle([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
-                                          fill=(30, 30, 35), outline=None)
-                            # Left accent bar
-                            draw.rectangle([bubble_x, bubble_y, bubble_x + 4, bubble_y + bubble_height], 
-                                          fill=(100, 100, 120))
-                            
-                        elif style == "whisper":
-                            # Dashed outline ellipse (simulated with dots)
-                            # First draw white background
-                            draw.ellipse([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
-                                        fill="white", outline=None)
-                            # Draw dashed border using line segments
-                            cx = bubble_x + bubble_width // 2
-                            cy = bubble_y + bubble_height // 2
-                            import math
-                            dash_count = 20
-                            for i in range(dash_count):
-                                if i % 2 == 0:  # Only draw every other segment (dash)
-                                    angle1 = (360 / dash_count) * i
-                                    angle2 = (360 / dash_count) * (i + 0.7)
-                                    x1 = cx + int((bubble_width // 2) * math.cos(math.radians(angle1)))
-                                    y1 = cy + int((bubble_height // 2) * math.sin(math.radians(angle1)))
-                                    x2 = cx + int((bubble_width // 2) * math.cos(math.radians(angle2)))
-                                    y2 = cy + int((bubble_height // 2) * math.sin(math.radians(angle2)))
-                                    draw.line([(x1, y1), (x2, y2)], fill="gray", width=1)
-                        else:
-                            # Regular speech bubble - clean ellipse
-                            draw.ellipse([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
-                                        fill="white", outline="black", width=2)
-                        
-                        # Draw text (with special handling for narrator)
-                        text_x = bubble_x + padding
-                        text_y = bubble_y + padding
-                        if style == "narrator":
-                            text_x += 6  # Account for left accent bar
-                            draw.multiline_text((text_x, text_y), wrapped_text, fill="white", font=font)
-                        else:
-                            draw.multiline_text((text_x, text_y), wrapped_text, fill="black", font=font)
-                
-                # Convert to RGB for PDF
-                rendered_pages.append(img.convert("RGB"))
-            
-            if not rendered_pages:
-                raise HTTPException(status_code=500, detail="Could not render pages with dialogues")
-            
-            # Create PDF with rendered pages
-            pdf_path = output_dir / f"manga_{job_id}_with_dialogues.pdf"
-            rendered_pages[0].save(
-                str(pdf_path),
-                "PDF",
-                resolution=150.0,
-                save_all=True,
-                append_images=rendered_pages[1:] if len(rendered_pages) > 1 else []
-            )
-            
-            return FileResponse(
-                str(pdf_path),
-                media_type="application/pdf",
-                filename=f"manga_{job_id}.pdf"
-            )
-            
-        except json.JSONDecodeError:
-            print("Warning: Could not parse dialogues JSON, returning raw PDF")
-        except Exception as e:
-            print(f"PDF rendering error: {e}")
-            # Fall through to return raw PDF
-    
-    # Default: return original files
-    if file_type == "pdf":
-        file_path = result.get("pdf")
-    elif file_type == "png":
-        # Return first page PNG
-        pages = result.get("pages", [])
-        if pages:
-            file_path = pages[0].get("page_image")
-        else:
-            file_path = None
-    else:
-        raise HTTPException(status_code=400, detail="Invalid file type")
-    
-    if not file_path or not Path(file_path).exists():
-        raise HTTPException(status_code=404, detail="File not found")
-    
-    return FileResponse(
-        file_path,
-        media_type="application/octet-stream",
-        filename=Path(file_path).name
-    )
-
 
 @app.get("/api/preview/{job_id}/{page_num}")
 async def get_page_preview(job_id: str, page_num: int):
     """Get preview image for a specific page."""
     
-    if job_id not in jobs:
+    job = await get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
     if not job.result:
         raise HTTPException(status_code=400, detail="No result yet")
     
@@ -813,21 +713,41 @@ async def get_page_preview(job_id: str, page_num: int):
 # Background Generation
 # ============================================
 
-def run_panel_regeneration(job_id: str, page: int, panel: int, prompt_override: Optional[str] = None):
-    """Regenerate a single panel in background."""
+# Image generators reused across background regenerations, keyed by output dir
+_GENERATOR_POOL_SIZE = 32
+_generator_pool: "OrderedDict[str, Any]" = OrderedDict()
+_generator_pool_lock = threading.Lock()
+
+
+def _get_generator(output_dir: str):
+    """Get (or create) the PollinationsGenerator for an output directory."""
     from scripts.generate_panels_api import PollinationsGenerator
-    import time
     
+    with _generator_pool_lock:
+        generator = _generator_pool.get(output_dir)
+        if generator is None:
+            generator = PollinationsGenerator(output_dir=output_dir)
+            _generator_pool[output_dir] = generator
+            if len(_generator_pool) > _GENERATOR_POOL_SIZE:
+                _generator_pool.popitem(last=False)
+        else:
+            _generator_pool.move_to_end(output_dir)
+        return generator
+
+
+def run_panel_regeneration(job_id: str, page: int, panel: int, prompt_override: Optional[str] = None):
+    """Regenerate a single panel in background."""
     job = jobs[job_id]
-    output_dir = Path("outputs") / job_id
+    output_dir = job.output_dir
     
     try:
         # Get the original prompt if available, or use override
         prompt = prompt_override or f"manga panel, anime style, high quality, detailed"
         
         # Generate new image
-        generator = PollinationsGenerator(output_dir=str(output_dir))
-        filename = f"regen_p{page}_panel{panel}_{int(time.time())}.png"
+        generator = _get_generator(str(output_dir))
+        # ns-resolution hex suffix - second-resolution stamps collided under burst regens
+        filename = f"regen_p{page}_panel{panel}_{time.time_ns():x}.png"
         
         result_path = generator.generate_image(
             prompt=prompt,
@@ -852,12 +772,138 @@ def run_panel_regeneration(job_id: str, page: int, panel: int, prompt_override:
             job.log_messages.append(f"> ❌ Regeneration failed: {str(e)}")
 
 
+class _ProgressDispatcher:
+    """
+    Progress callback for run_generation.
+    
+    Routes MangaGenerator events to a handler via a lookup table instead of an
+    if/elif chain, and holds only the job state it needs.
+    """
+    
+    __slots__ = ("job", "job_id", "title", "_pages_by_num", "_progress_table")
+    
+    def __init__(self, job: JobStatus, job_id: str, title: str):
+        self.job = job
+        self.job_id = job_id
+        self.title = title
+        # Live-preview pages by page number, so duplicate events are an O(1) check
+        self._pages_by_num: Dict[int, dict] = {}
+        self._progress_table = self._build_progress_table(job.total_panels or 0)
+    
+    @staticmethod
+    def _build_progress_table(total_panels: int) -> List[int]:
+        """Overall progress after each panel: 20% (start) -> 90% (panels done)."""
+        return [20 + (70 * (i + 1)) // total_panels for i in range(total_panels)]
+    
+    def _log(self, msg: str):
+        if self.job.log_messages is not None:
+            self.job.log_messages.append("> " + msg)
+    
+    def _on_page_complete(self, data: Dict):
+        job = self.job
+        if job.result is None:
+            job.result = {"pages": [], "title": self.title}
+        
+        # Skip duplicate events for a page we already have
+        if data["page_num"] not in self._pages_by_num:
+            # Store absolute path for API FileResponse serving
+            page = {
+                "page_number": data["page_num"],
+                "page_image": data["image_path"],
+                "panels": [] # Panels added here if needed
+            }
+            self._pages_by_num[data["page_num"]] = page
+            # Pages finish out of order in parallel runs; keep the list sorted for readers
+            bisect.insort(job.result.setdefault("pages", []), page, key=_get_page_number)
+            self._log(f"📸 Live preview ready for Page {data['page_num']}")
+    
+    def _on_plan_complete(self, data: Dict):
+        # Update total_panels with actual count
+        actual_total = data.get("total_panels", 0)
+        self.job.total_panels = actual_total
+        self._progress_table = self._build_progress_table(actual_total)
+        # Pre-fill panel_previews for loading skeletons
+        self.job.panel_previews = ["loading"] * actual_total
+        self._log(f"Plan complete: {actual_total} panels planned")
+    
+    def _on_panel_complete(self, data: Dict):
+        job = self.job
+        if job.panel_previews is None:
+            job.panel_previews = []
+        
+        # Ensure list is large enough (normally pre-sized at plan_complete)
+        idx = data["panel_index"]
+        if idx >= len(job.panel_previews):
+            job.panel_previews.extend(["loading"] * (idx + 1 - len(job.panel_previews)))
+        
+        # Store RELATIVE URL for direct frontend loading
+        filename = Path(data["image_path"]).name
+        job.panel_previews[idx] = f"/outputs/{self.job_id}/{filename}"
+        
+        # Update counters and progress
+        job.current_panel = idx + 1
+        if idx < len(self._progress_table):
+            job.progress = self._progress_table[idx]
+        elif job.total_panels and job.total_panels > 0:
+            # More panels than planned - keep the original formula
+            job.progress = 20 + (70 * (idx + 1)) // job.total_panels
+        
+        self._log(_PANEL_LOG_TMPL % (idx + 1, job.progress))
+    
+    def _on_step_started(self, data: Dict):
+        # Pipeline step transitions for Timeline (V4: 5-step)
+        job = self.job
+        step_type = data.get("step")
+        if job.steps:
+            if step_type == "composition":
+                job.steps[1].status = "completed"  # Generating panels done
+                job.steps[2].status = "in_progress" # Composing pages
+            elif step_type == "cover":
+                job.steps[2].status = "completed"  # Composing pages done
+                job.steps[3].status = "in_progress" # Generating cover
+                job.progress = 92
+                job.current_step = "Generating cover..."
+    
+    def _on_cover_start(self, data: Dict):
+        # V4: Cover generation started
+        job = self.job
+        if job.steps:
+            job.steps[2].status = "completed"  # Composing pages done
+            job.steps[3].status = "in_progress" # Generating cover
+        job.progress = 92
+        job.current_step = "Generating cover..."
+    
+    _HANDLERS = {
+        "page_complete": _on_page_complete,
+        "plan_complete": _on_plan_complete,
+        "panel_complete": _on_panel_complete,
+        "step_started": _on_step_started,
+        "cover_start": _on_cover_start,
+    }
+    
+    def __call__(self, msg: str, percent: int, data: Optional[Dict] = None):
+        job = self.job
+        job.current_step = msg
+        if percent >= 0:
+            job.progress = percent
+        self._log(msg)
+        
+        if data:
+            handler = self._HANDLERS.get(data.get("event"))
+            if handler is not None:
+                handler(self, data)
+        
+        # Detect Story Analysis completion via log message
+        if "Story planning complete" in msg and job.steps:
+            job.steps[0].status = "completed"
+            job.steps[1].status = "in_progress" # Start generating panels
+
+
 async def run_generation(job_id: str, request: GenerateRequest):
     """Run manga generation in background with detailed progress tracking."""
     
     # V4: Initialize sync MongoDB client BEFORE generation starts
     # This prevents silent auto-save failures that caused the user's data loss
-    from src.database.mongodb import Database
     Database.init_sync_client()
     
     job = jobs[job_id]
@@ -865,7 +911,7 @@ async def run_generation(job_id: str, request: GenerateRequest):
     def log(msg: str):
         """Add a log message."""
         if job.log_messages is not None:
-            job.log_messages.append(f"> {msg}")
+            job.log_messages.append("> " + msg)
     
     def update_step(idx: int, status: str, duration: str = None):
         """Update a step's status."""
@@ -896,10 +942,6 @@ async def run_generation(job_id: str, request: GenerateRequest):
         return " | ".join(context_parts)
     
     try:
-        # Import here to avoid circular imports
-        from scripts.generate_manga import MangaGenerator, MangaConfig
-        import time
-        
         step_start = time.time()
         
         # Update status
@@ -912,9 +954,9 @@ async def run_generation(job_id: str, request: GenerateRequest):
         # Priority: Request Keys (BYOK) > Environment Variables
         api_keys = request.api_keys or {}
         
-        groq_key = api_keys.get("GROQ_API_KEY") or os.environ.get("GROQ_API_KEY")
-        nvidia_key = api_keys.get("NVIDIA_API_KEY") or os.environ.get("NVIDIA_API_KEY")
-        gemini_key = api_keys.get("GEMINI_API_KEY") or os.environ.get("GEMINI_API_KEY")
+        groq_key = api_keys.get("GROQ_API_KEY") or _ENV_GROQ_KEY
+        nvidia_key = api_keys.get("NVIDIA_API_KEY") or _ENV_NVIDIA_KEY
+        gemini_key = api_keys.get("GEMINI_API_KEY") or _ENV_GEMINI_KEY
         
         # BYOK Pollinations: user's key takes priority over server key
         byok_poll_key = api_keys.get("POLLINATIONS_API_KEY")
@@ -934,14 +976,11 @@ async def run_generation(job_id: str, request: GenerateRequest):
             style=request.style,
             layout=request.layout,
             pages=request.pages,
-            output_dir=str(OUTPUT_DIR / job_id),
+            output_dir=str(job.output_dir),  # Created when the job was queued
             engine=request.engine,  # DUAL ENGINE: z_image, flux_dev, flux_schnell, pollinations
             is_complete_story=False  # Default to chapter mode
         )
         
-        # Create output directory for this job
-        Path(config.output_dir).mkdir(parents=True, exist_ok=True)
-        
         # Step 1: Story Planning
         update_step(0, "in_progress")
         job.current_step = "Planning story with AI..."
@@ -975,106 +1014,19 @@ async def run_generation(job_id: str, request: GenerateRequest):
         job.progress = 20
         log(f"Starting parallel panel generation ({job.total_panels} panels)...")
         
-        # Define callback for real-time progress updates
-        def progress_handler(msg: str, percent: int, data: Optional[Dict] = None):
-            job.current_step = msg
-            if percent >= 0:
-                job.progress = percent
-            log(msg)
-            
-            # Handle live preview updates
-            if data and data.get("event") == "page_complete":
-                if job.result is None:
-                    job.result = {"pages": [], "title": request.title}
-                
-                # Check if page already exists to avoid duplicates
-                page_exists = False
-                if "pages" in job.result:
-                    for p in job.result["pages"]:
-                        if p.get("page_number") == data["page_num"]:
-                            page_exists = True
-                            break
-                
-                if not page_exists:
-                    # Store absolute path for API FileResponse serving
-                    job.result["pages"].append({
-                        "page_number": data["page_num"],
-                        "page_image": data["image_path"],
-                        "panels": [] # Panels added here if needed
-                    })
-                    log(f"📸 Live preview ready for Page {data['page_num']}")
-            
-            # Handle plan completion - update total_panels with actual count
-            elif data and data.get("event") == "plan_complete":
-                actual_total = data.get("total_panels", 0)
-                job.total_panels = actual_total
-                # Pre-fill panel_previews for loading skeletons
-                job.panel_previews = ["loading"] * actual_total
-                log(f"Plan complete: {actual_total} panels planned")
-            
-            elif data and data.get("event") == "panel_complete":
-                # Handle panel live preview
-                if job.panel_previews is None:
-                    job.panel_previews = []
-                
-                # Ensure list is large enough
-                idx = data["panel_index"]
-                while len(job.panel_previews) <= idx:
-                    job.panel_previews.append("loading")
-                
-                # Store RELATIVE URL for direct frontend loading
-                filename = Path(data["image_path"]).name
-                relative_url = f"/outputs/{job_id}/{filename}"
-                
-                job.panel_previews[idx] = relative_url
-                
-                # Update counters and progress
-                job.current_panel = idx + 1
-                if job.total_panels and job.total_panels > 0:
-                    # Progress logic: 20% (start) -> 90% (panels done)
-                    # We map panel completion to the 20-90% range
-                    panel_prog = 20 + int(70 * (idx + 1) / job.total_panels)
-                    job.progress = panel_prog
-                    
-                log(f"🖼️ Generated panel {idx + 1} ({job.progress}%)")
-            
-            elif data and data.get("event") == "step_started":
-                # Handle pipeline step transitions for Timeline (V4: 5-step)
-                step_type = data.get("step")
-                if job.steps:
-                    if step_type == "composition":
-                        job.steps[1].status = "completed"  # Generating panels done
-                        job.steps[2].status = "in_progress" # Composing pages
-                    elif step_type == "cover":
-                        job.steps[2].status = "completed"  # Composing pages done
-                        job.steps[3].status = "in_progress" # Generating cover
-                        job.progress = 92
-                        job.current_step = "Generating cover..."
-            
-            elif data and data.get("event") == "cover_start":
-                # V4: Cover generation started
-                if job.steps:
-                    job.steps[2].status = "completed"  # Composing pages done
-                    job.steps[3].status = "in_progress" # Generating cover
-                job.progress = 92
-                job.current_step = "Generating cover..."
-
-            # Detect Story Analysis completion via log message
-            if "Story planning complete" in msg and job.steps:
-                job.steps[0].status = "completed"
-                job.steps[1].status = "in_progress" # Start generating panels
+        # Pre-size previews; plan_complete resizes once the real count is known
+        job.panel_previews = ["loading"] * (job.total_panels or 0)
+        
+        # Callback for real-time progress updates
+        progress_handler = _ProgressDispatcher(job, job_id, request.title)
 
         # Step 1: Story Planning
         # ------------------------
         # NEW: Generate Story Blueprint if using StoryDirector
         # This gives the project a "Soul" for future high-quality continuation
         
-        from src.ai.story_director import StoryDirector
-        story_director = None
-        blueprint = {}
-        
-        # gemini_key is already defined above
-        if gemini_key:
+        def _build_blueprint() -> dict:
+            """Blocking LLM call - runs on a worker thread alongside panel generation."""
             try:
                 log("🧠 Creating Story Blueprint (High-Quality Context)...")
                 story_director = StoryDirector(gemini_key)
@@ -1094,21 +1046,16 @@ async def run_generation(job_id: str, request: GenerateRequest):
                     "last_panel_description": "End of Chapter 1"
                 }
                 
-                log(f"📘 Blueprint created: {blueprint.get('title')} ({len(blueprint.get('chapter_outlines', []))} chapters)")
-                
-                # V4: Update total_panels with ACTUAL count from blueprint (not estimate!)
-                if request.layout == "dynamic":
-                    actual_panel_count = 0
-                    for page in blueprint.get("pages", []):
-                        panels = page.get("panels", [])
-                        actual_panel_count += len(panels)
-                    
-                    if actual_panel_count > 0:
-                        job.total_panels = actual_panel_count
-                        log(f"📊 Dynamic layout: {actual_panel_count} panels total (not {request.pages * 4})")
+                log(f"📘 Blueprint created: {blueprint.get('title')} ({len(blueprint.get('chapter_outlines', ()))} chapters)")
+                return blueprint
                 
             except Exception as e:
                 log(f"⚠️ Blueprint generation failed (will use fallback): {e}")
+                return {}
+        
+        # The blueprint is only persisted with the project, so nothing below waits on it
+        # until the DB save (gemini_key is already defined above)
+        blueprint_task = asyncio.create_task(asyncio.to_thread(_build_blueprint)) if gemini_key else None
 
         # This is where we hook into panel generation
         result = await generator.generate_chapter(
@@ -1149,12 +1096,11 @@ async def run_generation(job_id: str, request: GenerateRequest):
         job.current_step = "Done!"
         job.result = result
         log("✅ Generation complete!")
+        await publish_job(job)
         
         # Save to MongoDB if available - FORCE SAVE full initial state
         try:
-            from src.database.mongodb import Database
-            import asyncio
-            from datetime import datetime
+            blueprint = await blueprint_task if blueprint_task else {}
             
             # V4 Force Save: Extract dialogues from result immediately after generation
             # This ensures all LLM-generated content is saved even if user doesn't edit
@@ -1225,6 +1171,7 @@ async def run_generation(job_id: str, request: GenerateRequest):
                                 
                                 initial_dialogues[panel_key] = panel_dialogues
             
+            saved_at = datetime.now().isoformat()
             project_data = {
                 "job_id": job_id,
                 "manga_title": result.get("manga_title", request.title),  # Series name
@@ -1232,8 +1179,8 @@ async def run_generation(job_id: str, request: GenerateRequest):
                 "pages": request.pages,
                 "style": request.style,
                 "layout": request.layout,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
+                "created_at": saved_at,
+                "updated_at": saved_at,
                 # Use generated cover if available, else first page
                 "cover_url": result.get("cover_url") or f"/outputs/{job_id}/manga_page_01.png",
                 "result": result,
@@ -1264,11 +1211,16 @@ async def run_generation(job_id: str, request: GenerateRequest):
             
             log(f"💾 Auto-saving project to MongoDB...")
             
-            # Use sync save method - no async loop conflicts!
-            if Database.save_job_sync(job_id, project_data):
-                log("💾 ✅ Auto-saved to MongoDB with Blueprint + Dialogues")
-            else:
-                log("⚠️ MongoDB auto-save failed (sync_db not available)")
+            async def _auto_save():
+                # Sync PyMongo client on a worker thread - the event loop keeps serving requests
+                if await asyncio.to_thread(Database.save_job_sync, job_id, project_data):
+                    _invalidate_project_reads(job_id)
+                    log("💾 ✅ Auto-saved to MongoDB with Blueprint + Dialogues")
+                else:
+                    log("⚠️ MongoDB auto-save failed (sync_db not available)")
+            
+            # Write-behind: drained on shutdown, so the save still lands before exit
+            _schedule_db_write(_auto_save(), f"auto-save {job_id}")
                 
         except Exception as db_error:
             import traceback
@@ -1282,6 +1234,7 @@ async def run_generation(job_id: str, request: GenerateRequest):
         job.error = str(e)
         job.current_step = "Failed"
         log(f"❌ Error: {str(e)}")
+        await publish_job(job)
 
 # ============================================
 # Panel Regeneration API
@@ -1289,6 +1242,54 @@ async def run_generation(job_id: str, request: GenerateRequest):
 
 # RegenerateRequest model is defined at the top of the file (line ~65)
 
+POLLINATIONS_IMAGE_URL = "https://gen.pollinations.ai/image/"
+
+# Per-panel tail of the regeneration prompt (appended to _regen_prompt_prefix)
+REGEN_PROMPT_TAIL = """
+## PAGE {page}, PANEL {panel}
+Page Summary: {page_summary}
+Original Panel: {original_panel_prompt}
+
+## USER FEEDBACK
+The user said: "{user_feedback}\""""
+
+_REGEN_STYLE_TAGS = {
+    "bw_manga": "Black and white manga style: use 'manga, monochrome, ink lineart, screentone, dramatic shadows'",
+}
+_REGEN_STYLE_DEFAULT = "Color anime style: use 'anime, vibrant colors, cel shading, detailed'"
+
+
+@lru_cache(maxsize=256)
+def _regen_prompt_prefix(chapter_title: str, story_summary: str, characters: tuple, style: str) -> str:
+    """Static part of the regeneration prompt - identical for every panel of a job (memoized)."""
+    characters_context = "\n".join(
+        f"{name}: {appearance}" for name, appearance in characters
+    ) or "No specific characters defined"
+    
+    return f"""You are a manga panel prompt engineer. A user wants to REGENERATE a panel from their manga.
+
+## YOUR TASK
+Based on the user's NATURAL LANGUAGE feedback, generate an IMPROVED image prompt for this panel.
+The prompt should:
+1. Maintain visual consistency with the characters described
+2. Fit the story context and this page's mood
+3. Address whatever the user is unhappy about
+4. Be formatted as comma-separated visual tags (NOT prose)
+
+Return ONLY the improved prompt (comma-separated tags), no explanation.
+Example format: character action, expression, camera angle, lighting, environment, style tags
+
+## STYLE
+{_REGEN_STYLE_TAGS.get(style, _REGEN_STYLE_DEFAULT)}
+
+## STORY CONTEXT
+Title: {chapter_title}
+Story Summary: {story_summary}
+
+## CHARACTERS (use these for visual consistency)
+{characters_context}
+"""
+
 @app.post("/api/regenerate/{job_id}")
 async def regenerate_panel(job_id: str, request: RegenerateRequest):
     """
@@ -1301,17 +1302,15 @@ async def regenerate_panel(job_id: str, request: RegenerateRequest):
     4. LLM generates refined prompt that maintains consistency
     5. Generate new panel with proper style tags
     """
-    if job_id not in jobs:
+    job = await get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
     if job.status != "completed":
         raise HTTPException(status_code=400, detail="Can only regenerate completed jobs")
     
     try:
-        import httpx
         from pathlib import Path
-        from src.ai.llm_factory import get_llm
         
         # ============================================
         # Step 1: Extract full context from job result
@@ -1322,15 +1321,12 @@ async def regenerate_panel(job_id: str, request: RegenerateRequest):
         chapter_title = result.get("title", "Untitled")
         style = result.get("style", "bw_manga")
         
-        # Get character info for consistency
-        characters = result.get("characters", [])
-        character_descriptions = []
-        for char in characters:
-            if isinstance(char, dict):
-                name = char.get("name", "Unknown")
-                appearance = char.get("appearance", "")
-                character_descriptions.append(f"{name}: {appearance}")
-        characters_context = "\n".join(character_descriptions) if character_descriptions else "No specific characters defined"
+        # Get character info for consistency (hashable, so the prompt prefix can be memoized)
+        characters = tuple(
+            (str(c.get("name", "Unknown")), str(c.get("appearance", "")))
+            for c in result.get("characters", [])
+            if isinstance(c, dict)
+        )
         
         # Get the specific page and panel context
         pages = result.get("pages", [])
@@ -1358,43 +1354,22 @@ async def regenerate_panel(job_id: str, request: RegenerateRequest):
         
         user_feedback = request.prompt_override or "Make this panel better"
         
-        llm_prompt = f"""You are a manga panel prompt engineer. A user wants to REGENERATE a panel from their manga.
-
-## STORY CONTEXT
-Title: {chapter_title}
-Story Summary: {story_summary}
-Page {request.page} Summary: {page_summary}
-Panel Number: {request.panel + 1}
-
-## CHARACTERS (use these for visual consistency)
-{characters_context}
-
-## ORIGINAL PANEL
-{original_panel_prompt}
-
-## USER FEEDBACK
-The user said: "{user_feedback}"
-
-## YOUR TASK
-Based on the user's NATURAL LANGUAGE feedback, generate an IMPROVED image prompt for this panel.
-The prompt should:
-1. Maintain visual consistency with the characters described
-2. Fit the story context and this page's mood
-3. Address whatever the user is unhappy about
-4. Be formatted as comma-separated visual tags (NOT prose)
-
-## STYLE
-{"Black and white manga style: use 'manga, monochrome, ink lineart, screentone, dramatic shadows'" if style == "bw_manga" else "Color anime style: use 'anime, vibrant colors, cel shading, detailed'"}
-
-Return ONLY the improved prompt (comma-separated tags), no explanation.
-Example format: character action, expression, camera angle, lighting, environment, style tags"""
+        # Static blocks first, volatile feedback last - keeps the shared prefix
+        # identical across regenerations so provider-side prefix caching kicks in
+        llm_prompt = _regen_prompt_prefix(str(chapter_title), str(story_summary), characters, style) + REGEN_PROMPT_TAIL.format(
+            page=request.page,
+            panel=request.panel + 1,
+            page_summary=page_summary,
+            original_panel_prompt=original_panel_prompt,
+            user_feedback=user_feedback,
+        )
 
         print(f"\n🧠 Regeneration: Using LLM to understand feedback...")
         print(f"   User said: \"{user_feedback[:50]}...\"")
         
         # Get LLM to process the feedback
         llm = get_llm()
-        refined_prompt = llm.generate(llm_prompt, max_tokens=500)
+        refined_prompt = await asyncio.to_thread(llm.generate, llm_prompt, max_tokens=500)
         refined_prompt = refined_prompt.strip()
         
         # Remove quotes if LLM added them
@@ -1407,15 +1382,13 @@ Example format: character action, expression, camera angle, lighting, environmen
         # Step 3: Generate new panel with Pollinations
         # ============================================
         
-        # Properly encode prompt
-        import urllib.parse
-        encoded_prompt = urllib.parse.quote(refined_prompt)
+        # One clock read gives both a fresh seed and a unique filename suffix
+        suffix = time.monotonic_ns()
+        new_seed = suffix & 0x3FFF or 1
         
-        # Use a different seed for variation
-        import random
-        new_seed = random.randint(1000, 9999)
-        
-        img_url = f"https://gen.pollinations.ai/image/{encoded_prompt}?width=768&height=768&nologo=true&seed={new_seed}"
+        # Prompt is one path segment - escape everything, including "/" and "?"
+        img_url = POLLINATIONS_IMAGE_URL + quote_from_bytes(refined_prompt.encode("utf-8"), safe=b"")
+        img_params = {"width": 768, "height": 768, "nologo": "true", "seed": new_seed}
         
         print(f"   🎨 Generating new panel...")
         
@@ -1425,31 +1398,38 @@ Example format: character action, expression, camera angle, lighting, environmen
         if poll_api_key:
             poll_headers["Authorization"] = f"Bearer {poll_api_key}"
         
-        async with httpx.AsyncClient(timeout=90.0) as client:
-            response = await client.get(img_url, headers=poll_headers)
-            
-            if response.status_code == 200:
-                # Save new panel (with timestamp to avoid overwrite)
-                import time
-                output_dir = Path("outputs") / job_id
-                timestamp = int(time.time())
-                panel_filename = f"p{request.page:02d}_panel_{request.panel + 1:02d}_regen_{timestamp}.png"
-                panel_path = output_dir / panel_filename
-                
-                with open(panel_path, "wb") as f:
-                    f.write(response.content)
-                
-                print(f"   ✅ Saved: {panel_path}")
-                
-                return {
-                    "success": True,
-                    "panel_path": str(panel_path),
-                    "refined_prompt": refined_prompt,
-                    "message": f"Panel {request.panel + 1} regenerated with context-aware prompt"
-                }
-            else:
-                raise HTTPException(status_code=500, detail=f"Image generation failed: {response.status_code}")
-                
+        # Save new panel (with unique suffix to avoid overwrite)
+        output_dir = job.output_dir
+        panel_filename = f"p{request.page:02d}_panel_{request.panel + 1:02d}_regen_{suffix}.png"
+        panel_path = output_dir / panel_filename
+        
+        # Stream straight to disk - the full PNG never sits in memory. Written to
+        # a .part file and renamed on success, so a dropped stream never leaves a
+        # truncated PNG in the publicly served outputs/
+        part_path = panel_path.with_name(panel_path.name + ".part")
+        try:
+            async with _get_http_client().stream("GET", img_url, params=img_params, headers=poll_headers) as response:
+                if response.status_code != 200:
+                    raise HTTPException(status_code=500, detail=f"Image generation failed: {response.status_code}")
+                async with aiofiles.open(part_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(chunk_size=65536):
+                        await f.write(chunk)
+            os.replace(part_path, panel_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        
+        print(f"   ✅ Saved: {panel_path}")
+        
+        return {
+            "success": True,
+            "panel_path": str(panel_path),
+            "refined_prompt": refined_prompt,
+            "message": f"Panel {request.panel + 1} regenerated with context-aware prompt"
+        }
+    
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         print(f"Regeneration error: {traceback.format_exc()}")
@@ -1460,24 +1440,63 @@ Example format: character action, expression, camera angle, lighting, environmen
 # Projects API (Dashboard)
 # ============================================
 
+# Only what the dashboard cards show - job docs also carry the full result/blueprint/dialogues.
+# pages is reduced to a count server-side so the page arrays never leave MongoDB.
+_PROJECT_LIST_PIPELINE = [
+    {"$sort": {"created_at": -1}},
+    {"$limit": 50},
+    {"$project": {
+        "_id": 0, "job_id": 1, "manga_title": 1, "title": 1,
+        "style": 1, "created_at": 1, "updated_at": 1, "cover_url": 1,
+        "pages": {"$cond": [{"$isArray": "$pages"}, {"$size": "$pages"}, {"$ifNull": ["$pages", 0]}]},
+    }},
+]
+
+
+# Dashboard navigation refetches near-identical project data; serve repeats
+# from memory for a few seconds. Writes below invalidate their entries.
+_PROJECT_READ_TTL = 5.0
+_PROJECT_READ_CACHE_SIZE = 256
+_project_reads: dict[str, tuple[float, dict]] = {}
+_PROJECT_LIST_KEY = "projects"
+
+
+def _get_cached_read(key: str) -> Optional[dict]:
+    """Return a cached project response if it hasn't expired."""
+    entry = _project_reads.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def _cache_read(key: str, response: dict):
+    """Cache a project response for _PROJECT_READ_TTL seconds."""
+    if len(_project_reads) >= _PROJECT_READ_CACHE_SIZE:
+        _project_reads.clear()  # Entries live 5s - dropping them all is cheap
+    _project_reads[key] = (time.monotonic() + _PROJECT_READ_TTL, response)
+
+
+def _invalidate_project_reads(job_id: str):
+    """Drop the dashboard listing and this project's cached reads."""
+    _project_reads.pop(_PROJECT_LIST_KEY, None)
+    _project_reads.pop(job_id, None)
+
+
 @app.get("/api/projects")
-async def get_projects():
+async def get_projects(db=Depends(get_db)):
     """Get all completed projects for dashboard."""
     try:
-        from src.database.mongodb import Database
-        
-        # Connect if not connected
-        if Database.db is None:
-            await Database.connect_db()
-        
-        if Database.db is not None:
+        if db is not None:
+            cached = _get_cached_read(_PROJECT_LIST_KEY)
+            if cached is not None:
+                return cached
+            
             projects = []
             
             # First, get from projects collection (user-saved projects)
             try:
-                cursor = Database.db.projects.find({}).sort("created_at", -1).limit(50)
-                async for doc in cursor:
-                    doc.pop("_id", None)
+                cursor = db.projects.aggregate(_PROJECT_LIST_PIPELINE)
+                for doc in await cursor.to_list(length=50):
                     # Ensure required fields exist
                     if "job_id" in doc:
                         projects.append({
@@ -1494,17 +1513,18 @@ async def get_projects():
             
             # Also get from jobs collection (auto-saved during generation)
             try:
-                cursor = Database.db.jobs.find({}).sort("created_at", -1).limit(50)
+                cursor = db.jobs.aggregate(_PROJECT_LIST_PIPELINE)
                 existing_job_ids = {p["job_id"] for p in projects}
-                async for doc in cursor:
-                    doc.pop("_id", None)
+                for doc in await cursor.to_list(length=50):
                     job_id = doc.get("job_id")
                     if job_id and job_id not in existing_job_ids:
                         projects.append(doc)
             except Exception as e:
                 print(f"Jobs collection query error: {e}")
             
-            return {"projects": projects, "source": "mongodb"}
+            response = {"projects": projects, "source": "mongodb"}
+            _cache_read(_PROJECT_LIST_KEY, response)
+            return response
         else:
             # Fallback: return from in-memory jobs
             projects = []
@@ -1540,8 +1560,8 @@ async def delete_project(job_id: str):
     deleted_files = False
     
     # 1. Delete from MongoDB
+    _invalidate_project_reads(job_id)
     try:
-        from src.database.mongodb import Database
         deleted_db = Database.delete_project_sync(job_id)
         if deleted_db:
             print(f"🗑️ Deleted project {job_id} from MongoDB")
@@ -1559,8 +1579,7 @@ async def delete_project(job_id: str):
             print(f"⚠️ Failed to delete output folder: {e}")
     
     # 3. Remove from in-memory jobs if present
-    if job_id in jobs:
-        del jobs[job_id]
+    if jobs.pop(job_id, None) is not None:
         print(f"🗑️ Removed {job_id} from in-memory jobs")
     
     if deleted_db or deleted_files:
@@ -1580,7 +1599,7 @@ class SaveProjectRequest(BaseModel):
     dialogues: Optional[dict] = None    # Panel dialogues from canvas
     
 @app.post("/api/projects/save")
-async def save_project(request: SaveProjectRequest, authorization: Optional[str] = Header(None)):
+async def save_project(request: SaveProjectRequest, authorization: Optional[str] = Header(None), db=Depends(get_db)):
     """
     Save project to user's profile.
     Falls back to local JSON storage if MongoDB is unavailable.
@@ -1677,19 +1696,16 @@ async def save_project(request: SaveProjectRequest, authorization: Optional[str]
     
     # Try MongoDB first, fallback to local file
     try:
-        from src.database.mongodb import Database
-        if Database.db is None:
-            await Database.connect_db()
-        
         # Check if auth is provided
         user_id = None
         if authorization and authorization.startswith("Bearer "):
             token = authorization.split(" ")[1]
             user_id = f"user_{token[:8]}" if token else None
         
-        if user_id and Database.db is not None:
+        if user_id and db is not None:
             success = await Database.save_project(user_id, project_data)
             if success:
+                _invalidate_project_reads(request.job_id)
                 return {"success": True, "message": "Project saved to your profile!", "job_id": request.job_id}
     except Exception as e:
         print(f"⚠️ MongoDB save failed: {e}")
@@ -1700,8 +1716,14 @@ async def save_project(request: SaveProjectRequest, authorization: Optional[str]
         save_dir.mkdir(parents=True, exist_ok=True)
         save_path = save_dir / "project_save.json"
         
-        with open(save_path, 'w', encoding='utf-8') as f:
-            json.dump(project_data, f, indent=2, default=str)
+        # orjson serializes straight to bytes; aiofiles keeps the write off the event loop
+        payload = orjson.dumps(
+            project_data,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+            default=str
+        )
+        async with aiofiles.open(save_path, "wb") as f:
+            await f.write(payload)
         
         print(f"💾 Project saved locally: {save_path}")
         return {
@@ -1716,19 +1738,14 @@ async def save_project(request: SaveProjectRequest, authorization: Optional[str]
 
 
 @app.get("/api/projects/{job_id}/dialogues")
-async def get_saved_dialogues(job_id: str):
+async def get_saved_dialogues(job_id: str, db=Depends(get_db)):
     """Get saved dialogue positions from MongoDB or local project_save.json."""
     
     # First try MongoDB
     try:
-        from src.database.mongodb import Database
-        
-        if Database.db is None:
-            await Database.connect_db()
-        
-        if Database.db is not None:
+        if db is not None:
             # Check projects collection
-            project = await Database.db.projects.find_one({"job_id": job_id})
+            project = await db.projects.find_one({"job_id": job_id})
             if project and project.get("dialogues"):
                 print(f"📝 Loaded dialogues from MongoDB for {job_id}")
                 return {
@@ -1763,23 +1780,23 @@ async def get_saved_dialogues(job_id: str):
 
 
 @app.get("/api/projects/{job_id}")
-async def get_project(job_id: str):
+async def get_project(job_id: str, db=Depends(get_db)):
     """Get full project data for loading in canvas."""
-    from src.database.mongodb import Database
-    
     # Try database first
-    if Database.db is None:
-        await Database.connect_db()
-    
-    if Database.db is not None:
+    if db is not None:
+        cached = _get_cached_read(job_id)
+        if cached is not None:
+            return cached
         project = await Database.get_project(job_id)
         if project:
             project.pop("_id", None)
-            return {"project": project, "source": "database"}
+            response = {"project": project, "source": "database"}
+            _cache_read(job_id, response)
+            return response
     
     # Fallback to in-memory jobs
-    if job_id in jobs:
-        job = jobs[job_id]
+    job = jobs.get(job_id)
+    if job is not None:
         if job.status == "completed":
             return {
                 "project": {
@@ -1796,6 +1813,32 @@ async def get_project(job_id: str):
     raise HTTPException(status_code=404, detail="Project not found")
 
 
+@lru_cache(maxsize=128)
+def _load_legacy_story(legacy_path: str, mtime_ns: int) -> dict:
+    """
+    Convert story_blueprint.json (legacy format) to the v1.0 story view.
+    
+    Cached on (path, mtime_ns) so repeat reads of an unchanged file skip
+    both the JSON parse and the dict rebuild. Callers must not mutate the result.
+    """
+    with open(legacy_path, 'rb') as f:
+        blueprint = orjson.loads(f.read())
+    chapter_plan = blueprint.get("chapter_plan", {})
+    return {
+        "story_context": {
+            "original_prompt": blueprint.get("original_prompt", ""),
+            "llm_interpretation": chapter_plan.get("summary", "")
+        },
+        "characters": chapter_plan.get("characters", []),
+        "pages": chapter_plan.get("pages", []),
+        "continuation_state": {
+            "cliffhanger": chapter_plan.get("cliffhanger", ""),
+            "next_chapter_hook": chapter_plan.get("next_chapter_hook", "")
+        },
+        "panel_prompts": blueprint.get("panel_prompts", [])
+    }
+
+
 @app.get("/api/projects/{job_id}/story")
 async def get_project_story(job_id: str):
     """
@@ -1825,23 +1868,10 @@ async def get_project_story(job_id: str):
     # Fall back to legacy format
     if legacy_path.exists():
         try:
-            with open(legacy_path, 'r', encoding='utf-8') as f:
-                blueprint = json.load(f)
-            # Convert legacy format to minimal story context
+            # Convert legacy format to minimal story context (memoized by mtime)
+            mtime_ns = legacy_path.stat().st_mtime_ns
             return {
-                "story": {
-                    "story_context": {
-                        "original_prompt": blueprint.get("original_prompt", ""),
-                        "llm_interpretation": blueprint.get("chapter_plan", {}).get("summary", "")
-                    },
-                    "characters": blueprint.get("chapter_plan", {}).get("characters", []),
-                    "pages": blueprint.get("chapter_plan", {}).get("pages", []),
-                    "continuation_state": {
-                        "cliffhanger": blueprint.get("chapter_plan", {}).get("cliffhanger", ""),
-                        "next_chapter_hook": blueprint.get("chapter_plan", {}).get("next_chapter_hook", "")
-                    },
-                    "panel_prompts": blueprint.get("panel_prompts", [])
-                },
+                "story": _load_legacy_story(str(legacy_path), mtime_ns),
                 "format": "legacy"
             }
         except Exception as e:
@@ -1915,6 +1945,153 @@ async def get_panel_faces(job_id: str, page: int, panel: int):
 # Dialogue Regeneration (V3 Phase 4)
 # ============================================
 
+# First fenced JSON object/array in an LLM response
+_JSON_FENCE = re.compile(r"```(?:json)?\s*([\[{].*?[\]}])\s*```", re.DOTALL)
+
+class _JsonCloseTracker:
+    """
+    Track bracket depth across streamed chunks to spot when the first
+    top-level JSON array/object closes. Brackets inside strings are ignored.
+    
+    Only a bracket that opens a line (or follows a ``` / ```json fence) starts
+    the value, so brackets in leading prose like "Sure [here you go]" don't.
+    """
+    
+    __slots__ = ("depth", "in_string", "escape", "pos", "start", "end", "line")
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.pos = 0
+        self.start = None
+        self.end = None
+        self.line = ""  # Text since the last newline, until the value starts
+    
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; returns True once the outer value is closed."""
+        for ch in chunk:
+            if self.start is None:
+                if (ch == '[' or ch == '{') and self.line.strip() in ("", "```", "```json"):
+                    self.start = self.pos
+                    self.depth = 1
+                elif ch == '\n':
+                    self.line = ""
+                else:
+                    self.line += ch
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '[' or ch == '{':
+                self.depth += 1
+            elif ch == ']' or ch == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    self.end = self.pos + 1
+                    self.pos += 1
+                    return True
+            elif ch == '"':
+                self.in_string = True
+            self.pos += 1
+        return False
+
+
+# Prompt for /api/dialogues/regenerate, filled with format_map per request
+DIALOGUE_PROMPT_TEMPLATE = """You are a manga dialogue writer. Regenerate the dialogue for this panel.
+
+STORY CONTEXT:
+{story_prompt}
+
+CHARACTERS IN STORY:
+{char_info}
+
+PANEL DESCRIPTION:
+{panel_description}
+
+CHARACTERS IN THIS PANEL:
+{characters_present}
+
+CURRENT DIALOGUE:
+{current_dialogue_text}
+{style_instruction}
+
+Generate NEW dialogue that:
+1. Fits the scene description
+2. Matches each character's personality
+3. Advances the story
+4. Uses appropriate bubble types (speech/thought/narrator/shout/whisper)
+
+Return ONLY a JSON array of dialogue objects:
+[
+  {{"character": "Name", "text": "What they say", "type": "speech"}},
+  {{"type": "narrator", "text": "Caption text"}},
+  {{"character": "Name", "text": "Inner thoughts", "type": "thought"}}
+]
+
+Return ONLY the JSON array, no other text."""
+
+@lru_cache(maxsize=256)
+def _fmt_characters(char_tuple: tuple) -> str:
+    """Format (name, personality) pairs for the dialogue prompt (memoized per cast)."""
+    return "\n".join(f"- {name}: {personality}" for name, personality in char_tuple)
+
+
+# Parsed story files keyed by path, reused while (mtime_ns, size) match
+_BLUEPRINT_CACHE_SIZE = 64
+_blueprint_cache: "OrderedDict[str, tuple[int, int, dict, dict]]" = OrderedDict()
+
+
+_get_page_fields = operator.itemgetter('page_number', 'panels')
+_get_panel_number = operator.itemgetter('panel_number')
+_get_page_number = operator.itemgetter('page_number')
+
+
+def _index_panels(story: dict) -> dict:
+    """Map (page_number, panel_number) -> panel for both v1.0 and legacy layouts."""
+    pages = story.get('pages') or story.get('chapter_plan', {}).get('pages', [])
+    index = {}
+    for page in pages:
+        try:
+            page_num, panels = _get_page_fields(page)
+        except KeyError:
+            page_num, panels = page.get('page_number'), page.get('panels', [])
+        for panel in panels:
+            try:
+                index[(page_num, _get_panel_number(panel))] = panel
+            except KeyError:
+                index[(page_num, None)] = panel
+    return index
+
+
+async def _load_story_json(path: Path) -> tuple[dict, dict]:
+    """
+    Load a story_state.json / story_blueprint.json, cached by mtime+size fingerprint.
+    
+    Returns (parsed story, panel index). Disk I/O and parsing run in a worker
+    thread; the cache itself is only touched on the event loop. Callers must
+    not mutate the returned objects.
+    """
+    st = await asyncio.to_thread(path.stat)
+    key = str(path)
+    cached = _blueprint_cache.get(key)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        _blueprint_cache.move_to_end(key)
+        return cached[2], cached[3]
+    
+    data = await asyncio.to_thread(path.read_bytes)
+    parsed = await asyncio.to_thread(orjson.loads, data)
+    panel_index = _index_panels(parsed)
+    _blueprint_cache[key] = (st.st_mtime_ns, st.st_size, parsed, panel_index)
+    _blueprint_cache.move_to_end(key)
+    if len(_blueprint_cache) > _BLUEPRINT_CACHE_SIZE:
+        _blueprint_cache.popitem(last=False)
+    return parsed, panel_index
+
+
 class RegenerateDialogueRequest(BaseModel):
     """Request to regenerate dialogue for a panel."""
     job_id: str
@@ -1941,42 +2118,32 @@ async def regenerate_dialogue(request: RegenerateDialogueRequest):
     panel_data = None
     characters = []
     
-    # Try to load story context
-    if story_state_path.exists():
-        with open(story_state_path, 'r', encoding='utf-8') as f:
-            story_state = json.load(f)
-            story_context = story_state.get('story_context', {})
-            characters = story_state.get('characters', [])
-            pages = story_state.get('pages', [])
-            for page in pages:
-                if page.get('page_number') == request.page:
-                    for panel in page.get('panels', []):
-                        if panel.get('panel_number') == request.panel:
-                            panel_data = panel
-                            break
-    elif legacy_path.exists():
-        with open(legacy_path, 'r', encoding='utf-8') as f:
-            blueprint = json.load(f)
-            chapter_plan = blueprint.get('chapter_plan', {})
-            story_context = {"original_prompt": blueprint.get("original_prompt", "")}
-            characters = chapter_plan.get('characters', [])
-            for page in chapter_plan.get('pages', []):
-                if page.get('page_number') == request.page:
-                    for panel in page.get('panels', []):
-                        if panel.get('panel_number') == request.panel:
-                            panel_data = panel
-                            break
+    # Try to load story context (disk reads + parsing run off the event loop)
+    has_state, has_legacy = await asyncio.to_thread(
+        lambda: (story_state_path.exists(), legacy_path.exists())
+    )
+    if has_state:
+        story_state, panel_index = await _load_story_json(story_state_path)
+        story_context = story_state.get('story_context', {})
+        characters = story_state.get('characters', [])
+        panel_data = panel_index.get((request.page, request.panel))
+    elif has_legacy:
+        blueprint, panel_index = await _load_story_json(legacy_path)
+        chapter_plan = blueprint.get('chapter_plan', {})
+        story_context = {"original_prompt": blueprint.get("original_prompt", "")}
+        characters = chapter_plan.get('characters', [])
+        panel_data = panel_index.get((request.page, request.panel))
     
     if not panel_data:
         raise HTTPException(status_code=404, detail="Panel not found in story data")
     
     # Build prompt for Groq
-    char_info = "\n".join([f"- {c.get('name')}: {c.get('personality', 'N/A')}" for c in characters])
+    char_info = _fmt_characters(tuple((str(c.get('name')), str(c.get('personality', 'N/A'))) for c in characters))
     current_dialogues = panel_data.get('dialogue', [])
-    current_dialogue_text = "\n".join([
+    current_dialogue_text = "\n".join(
         f"- [{d.get('type', 'speech')}] {d.get('character', 'Narrator')}: \"{d.get('text', '')}\""
         for d in current_dialogues
-    ])
+    )
     
     style_instruction = ""
     if request.style_hint:
@@ -1984,58 +2151,53 @@ async def regenerate_dialogue(request: RegenerateDialogueRequest):
     if request.character_focus:
         style_instruction += f"\nFocus: Center dialogue around {request.character_focus}"
     
-    prompt = f"""You are a manga dialogue writer. Regenerate the dialogue for this panel.
-
-STORY CONTEXT:
-{story_context.get('original_prompt', 'N/A')}
-
-CHARACTERS IN STORY:
-{char_info}
-
-PANEL DESCRIPTION:
-{panel_data.get('description', 'N/A')}
-
-CHARACTERS IN THIS PANEL:
-{', '.join(panel_data.get('characters_present', ['Unknown']))}
-
-CURRENT DIALOGUE:
-{current_dialogue_text}
-{style_instruction}
-
-Generate NEW dialogue that:
-1. Fits the scene description
-2. Matches each character's personality
-3. Advances the story
-4. Uses appropriate bubble types (speech/thought/narrator/shout/whisper)
-
-Return ONLY a JSON array of dialogue objects:
-[
-  {{"character": "Name", "text": "What they say", "type": "speech"}},
-  {{"type": "narrator", "text": "Caption text"}},
-  {{"character": "Name", "text": "Inner thoughts", "type": "thought"}}
-]
-
-Return ONLY the JSON array, no other text."""
+    prompt = DIALOGUE_PROMPT_TEMPLATE.format_map({
+        "story_prompt": story_context.get('original_prompt', 'N/A'),
+        "char_info": char_info,
+        "panel_description": panel_data.get('description', 'N/A'),
+        "characters_present": ', '.join(panel_data.get('characters_present', ['Unknown'])),
+        "current_dialogue_text": current_dialogue_text,
+        "style_instruction": style_instruction,
+    })
 
     try:
         # Use Groq for fast regeneration
-        from src.ai.llm_factory import get_llm
         llm = get_llm()
         
-        response = llm.generate(prompt, max_tokens=1000)
-        
-        # Parse JSON response
-        if "```json" in response:
-            response = response.split("```json")[1].split("```")[0]
-        elif "```" in response:
-            response = response.split("```")[1].split("```")[0]
-        
-        new_dialogues = json.loads(response.strip())
-        
-        # Add IDs to new dialogues
-        import uuid
-        for dlg in new_dialogues:
-            dlg['dialogue_id'] = f"dlg_{uuid.uuid4().hex[:8]}"
+        # Stream the completion and stop as soon as the outer JSON array closes
+        chunks = []
+        tracker = _JsonCloseTracker()
+        new_dialogues = None
+        stream = llm.astream(prompt, max_tokens=1000)
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                if tracker is not None and tracker.feed(chunk):
+                    try:
+                        new_dialogues = orjson.loads("".join(chunks)[tracker.start:tracker.end])
+                        break
+                    except orjson.JSONDecodeError:
+                        # Not the payload - read the rest and fall back to the fence
+                        tracker = None
+        finally:
+            await stream.aclose()
+        response = "".join(chunks)
+        
+        if new_dialogues is None:
+            # Parse JSON response (strip ``` fences if present)
+            match = _JSON_FENCE.search(response)
+            stripped = match.group(1) if match else response.strip()
+            
+            # Truncated output can't parse - bail before scanning the whole buffer
+            if not stripped or stripped[-1] not in '}]':
+                raise HTTPException(status_code=502, detail="LLM returned incomplete JSON")
+            
+            new_dialogues = orjson.loads(stripped)
+        
+        # Add IDs to new dialogues (one urandom read, 4 bytes -> 8 hex chars each)
+        raw = os.urandom(4 * len(new_dialogues))
+        for i, dlg in enumerate(new_dialogues):
+            dlg['dialogue_id'] = f"dlg_{raw[i * 4:(i + 1) * 4].hex()}"
         
         return {
             "success": True,
@@ -2047,11 +2209,67 @@ Return ONLY the JSON array, no other text."""
             "llm_used": llm.name
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Dialogue regeneration error: {e}")
+        logger.exception("Dialogue regeneration error for job %s", request.job_id)
         raise HTTPException(status_code=500, detail=f"Regeneration failed: {str(e)}")
 
 
+def _iter_panel_dialogues(pages: list):
+    """Yield (page_number, panel_index, dialogues) for every panel with dialogue."""
+    for page in pages:
+        if not isinstance(page, dict):
+            continue
+        page_num = page.get("page_number", 1)
+        page_dialogue = page.get("dialogue", [])
+        if not isinstance(page_dialogue, list):
+            continue
+        for panel_info in page_dialogue:
+            if isinstance(panel_info, dict):
+                dialogues = panel_info.get("dialogues")
+                if dialogues:
+                    yield page_num, panel_info.get("panel_index", 0), dialogues
+
+
+def _build_continuation_dialogue(i: int, d, page_num: int, panel_idx: int) -> dict:
+    """Build an editor dialogue entry with a default staggered position."""
+    is_dict = isinstance(d, dict)
+    return {
+        "id": f"cont-{page_num}-{panel_idx}-{i}",
+        "text": d.get("text", "") if is_dict else str(d),
+        "x": 10 if i % 2 == 0 else 60,
+        "y": 5 + (i // 2) * 20,
+        "style": d.get("style", "speech") if is_dict else "speech",
+        "character": d.get("character", "") if is_dict else "",
+        "fontSize": 11
+    }
+
+
+# Progress-message keywords -> continuation timeline step, as one case-insensitive
+# scan per message. Group order is the step order; the earliest step matched wins.
+_CONT_STEP_KEYWORDS = re.compile(
+    r"(?P<s0>planning|story director)"
+    r"|(?P<s1>panel|comfyui|processing page)"
+    r"|(?P<s2>composing)"
+    r"|(?P<s3>finalizing|saving)",
+    re.IGNORECASE,
+)
+
+
+def _match_continuation_step(msg: str) -> Optional[int]:
+    """Timeline step a progress message belongs to, or None."""
+    steps = [int(m.lastgroup[1]) for m in _CONT_STEP_KEYWORDS.finditer(msg)]
+    return min(steps) if steps else None
+
+
+# MangaConfig fields that are fixed for every continuation
+_CONT_CONFIG_DEFAULTS = MappingProxyType({
+    "layout": "dynamic",  # Fix: Force dynamic layout as requested by user
+    "is_complete_story": False,
+})
+
+
 class ContinueChapterRequest(BaseModel):
     pages: int = 3
     chapter_title: Optional[str] = None
@@ -2059,25 +2277,18 @@ class ContinueChapterRequest(BaseModel):
     api_keys: Optional[Dict[str, str]] = None # For BYOK support
 
 @app.post("/api/projects/{job_id}/continue")
-async def continue_chapter(job_id: str, request: ContinueChapterRequest, background_tasks: BackgroundTasks):
+async def continue_chapter(job_id: str, request: ContinueChapterRequest, background_tasks: BackgroundTasks, db=Depends(get_db)):
     """
     Generate next chapter/pages continuing the story.
     Uses StoryDirector.plan_continuation() with blueprint for consistency.
     """
-    from src.database.mongodb import Database
-    from src.ai.story_director import StoryDirector
-    
     # Get existing project from DB
-    if Database.db is None:
-        await Database.connect_db()
-    
     project = None
-    if Database.db is not None:
-        project = await Database.get_project(job_id)
+    if db is not None:
+        project = await Database.get_project_for_continuation(job_id)
     
     # Fallback to in-memory jobs
-    if not project and job_id in jobs:
-        job = jobs[job_id]
+    if not project and (job := jobs.get(job_id)) is not None:
         if job.result:
             project = {
                 "job_id": job_id,
@@ -2100,9 +2311,11 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
     # This appends pages to the same project instead of creating duplicates
     
     # Count existing pages for correct numbering (manga_page_04.png, etc.)
+    # DB projects only carry the last few pages; page_count is the real total
     existing_pages = project.get("pages", [])
-    starting_page_number = len(existing_pages) + 1
-    print(f"\n📚 Continuing project {job_id}: {len(existing_pages)} existing pages, starting at page {starting_page_number}")
+    page_count = project.get("page_count", len(existing_pages))
+    starting_page_number = page_count + 1
+    print(f"\n📚 Continuing project {job_id}: {page_count} existing pages, starting at page {starting_page_number}")
     
     # Extract blueprint or build one from existing data
     blueprint = project.get("blueprint", {})
@@ -2129,8 +2342,8 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
     
     # PROJECT MERGING: Update existing job status (or create if not in memory)
     # This allows frontend to show progress on the SAME project
-    if job_id in jobs:
-        continuation_job = jobs[job_id]
+    continuation_job = jobs.get(job_id)
+    if continuation_job is not None:
         continuation_job.status = "processing"
         continuation_job.progress = 0
         continuation_job.current_step = "Planning continuation..."
@@ -2143,12 +2356,12 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
         continuation_job.current_panel = 0
         continuation_job.total_panels = None
         continuation_job.panel_previews = []
-        continuation_job.log_messages = [
+        continuation_job.log_messages = deque([
             f"> Continuing story: {job_id}",
             f"> Starting at page {starting_page_number}",
             f"> Target: {request.pages} new pages",
             "> Using DYNAMIC layout"
-        ]
+        ], maxlen=LOG_BUFFER_SIZE)
     else:
         continuation_job = JobStatus(
             job_id=job_id,
@@ -2172,9 +2385,6 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
     # Run continuation in background
     async def run_continuation():
         try:
-            # Import generator (same as in run_generation)
-            from scripts.generate_manga import MangaGenerator, MangaConfig
-            
             # Helper function for story continuation context
             def _get_last_page_context(result):
                 """Extract last page/panel context for continuation."""
@@ -2196,6 +2406,13 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
                 
                 return " | ".join(context_parts)
             
+            # The full page list is only needed for the final result, so fetch it
+            # while the new pages generate instead of on the request path
+            previous_pages_task = (
+                asyncio.create_task(Database.get_project_pages(job_id))
+                if page_count > len(existing_pages) else None
+            )
+            
             continuation_job.current_step = "Initializing MangaGenerator..."
             continuation_job.progress = 5
             
@@ -2224,13 +2441,12 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
                 provider = project.get("image_provider", "comfyui") # Default fallback
             
             config = MangaConfig(
+                **_CONT_CONFIG_DEFAULTS,
                 title=f"{project.get('title')} (Continuation)",
                 style=project.get("style", "bw_manga"),
-                layout="dynamic", # Fix: Force dynamic layout as requested by user
                 pages=request.pages,
                 output_dir=str(OUTPUT_DIR / job_id),  # PROJECT MERGING: Use original folder
-                image_provider=provider,
-                is_complete_story=False,
+                engine=provider,  # Unknown engines fall back to Pollinations
                 starting_page_number=starting_page_number  # Continue from page N+1
             )
             
@@ -2242,7 +2458,7 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
 
             # Extract API keys (same logic as run_generation)
             api_keys = request.api_keys or {}
-            groq_key = api_keys.get("GROQ_API_KEY") or os.environ.get("GROQ_API_KEY")
+            groq_key = api_keys.get("GROQ_API_KEY") or _ENV_GROQ_KEY
             
             # 4. Prepare Characters from Blueprint
             characters = []
@@ -2259,13 +2475,17 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
             # Define helpers (Local to this job)
             def log(msg: str):
                 if continuation_job.log_messages is None:
-                    continuation_job.log_messages = []
-                continuation_job.log_messages.append(f"> {msg}")
+                    continuation_job.log_messages = deque(maxlen=LOG_BUFFER_SIZE)
+                continuation_job.log_messages.append("> " + msg)
             
             def update_step(idx: int, status: str):
                 if continuation_job.steps and 0 <= idx < len(continuation_job.steps):
                     continuation_job.steps[idx].status = status
 
+            # Each finished page is appended to MongoDB right away, so the writes
+            # overlap with the remaining pages' image generation
+            page_writes = []
+            
             # Define progress callback
             def progress_handler(msg: str, percent: int, data: Optional[Dict] = None):
                 continuation_job.current_step = msg
@@ -2276,18 +2496,11 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
                 log(msg)
                 
                 # Update Timeline (Basic Logic)
-                msg_lower = msg.lower()
-                if "planning" in msg_lower or "story director" in msg_lower:
-                    update_step(0, "in_progress")
-                elif "panel" in msg_lower or "comfyui" in msg_lower or "processing page" in msg_lower:
-                    update_step(0, "completed")
-                    update_step(1, "in_progress")
-                elif "composing" in msg_lower:
-                    update_step(1, "completed")
-                    update_step(2, "in_progress")
-                elif "finalizing" in msg_lower or "saving" in msg_lower:
-                    update_step(2, "completed")
-                    update_step(3, "in_progress")
+                step = _match_continuation_step(msg)
+                if step is not None:
+                    if step > 0:
+                        update_step(step - 1, "completed")
+                    update_step(step, "in_progress")
                 
                 # Handle plan completion - update total_panels with actual count
                 if data and data.get("event") == "plan_complete":
@@ -2315,6 +2528,18 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
                          # Map 20-90% progress
                         panel_prog = 20 + int(70 * (idx + 1) / continuation_job.total_panels)
                         continuation_job.progress = panel_prog
+                
+                if data and data.get("event") == "page_complete" and Database.db is not None:
+                    page_writes.append(_schedule_db_write(
+                        Database.db.projects.update_one(
+                            {"job_id": job_id},
+                            {
+                                "$push": {"pages": {"$each": [data["page"]], "$sort": {"page_number": 1}}},
+                                "$set": {"updated_at": datetime.now().isoformat()}
+                            }
+                        ),
+                        f"continuation page {data['page_num']}"
+                    ))
             
             # 5. EXECUTE GENERATION (The "One Call" Solution)
             # This runs StoryDirector -> ScriptDoctor -> Image Gen -> Layouts
@@ -2333,39 +2558,13 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
             
             # 6.5 Extract dialogues from new pages (same as run_generation)
             # This ensures continuation dialogues are merged into saved dialogues
-            new_dialogues = {}
-            for page in final_pages:
-                if not isinstance(page, dict):
-                    continue
-                page_num = page.get("page_number", 1)
-                page_dialogue = page.get("dialogue", [])
-                
-                # Convert page dialogue to panel-based format
-                if isinstance(page_dialogue, list):
-                    for panel_info in page_dialogue:
-                        if isinstance(panel_info, dict):
-                            panel_idx = panel_info.get("panel_index", 0)
-                            dialogues = panel_info.get("dialogues", [])
-                            if dialogues:
-                                panel_key = f"page-{page_num}-panel-{panel_idx}"
-                                
-                                # Build dialogues with default positions
-                                panel_dialogues = []
-                                for i, d in enumerate(dialogues):
-                                    pos_x = 10 if i % 2 == 0 else 60
-                                    pos_y = 5 + (i // 2) * 20
-                                    
-                                    panel_dialogues.append({
-                                        "id": f"cont-{page_num}-{panel_idx}-{i}",
-                                        "text": d.get("text", "") if isinstance(d, dict) else str(d),
-                                        "x": pos_x,
-                                        "y": pos_y,
-                                        "style": d.get("style", "speech") if isinstance(d, dict) else "speech",
-                                        "character": d.get("character", "") if isinstance(d, dict) else "",
-                                        "fontSize": 11
-                                    })
-                                
-                                new_dialogues[panel_key] = panel_dialogues
+            new_dialogues = {
+                f"page-{page_num}-panel-{panel_idx}": [
+                    _build_continuation_dialogue(i, d, page_num, panel_idx)
+                    for i, d in enumerate(dialogues)
+                ]
+                for page_num, panel_idx, dialogues in _iter_panel_dialogues(final_pages)
+            }
             
             print(f"💬 Extracted {len(new_dialogues)} panel dialogues from continuation")
             
@@ -2381,27 +2580,35 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
             }
             
             if Database.db is not None:
-                # Get existing dialogues first
-                existing_project = await Database.db.projects.find_one({"job_id": job_id})
-                existing_dialogues = existing_project.get("dialogues", {}) if existing_project else {}
+                # Pages were pushed as they finished; the story_state write goes last
+                await asyncio.gather(*page_writes)
                 
-                # Merge new dialogues with existing ones
-                merged_dialogues = {**existing_dialogues, **new_dialogues}
+                # MERGE: single pipeline update merges dialogues server-side
+                # (one round-trip, atomic w.r.t. concurrent continuations).
+                # $literal keeps user text like "$100" from being read as a field path.
+                # Write-behind: don't hold the "completed" status on a large update
+                async def _merge_continuation():
+                    await Database.db.projects.update_one(
+                        {"job_id": job_id},
+                        [
+                            {"$set": {
+                                "dialogues": {"$mergeObjects": [
+                                    {"$ifNull": ["$dialogues", {}]},
+                                    {"$literal": new_dialogues}
+                                ]},
+                                "story_state": {"$literal": updated_state},
+                                "updated_at": datetime.now().isoformat()
+                            }}
+                        ]
+                    )
+                    # Only once the merge has landed - earlier, a read could re-cache the old dialogues
+                    _invalidate_project_reads(job_id)
                 
-                await Database.db.projects.update_one(
-                    {"job_id": job_id},
-                    {
-                        "$push": {"pages": {"$each": final_pages}},
-                        "$set": {
-                            "story_state": updated_state,
-                            "updated_at": datetime.now().isoformat(),
-                            "dialogues": merged_dialogues  # MERGE: Add new dialogues!
-                        }
-                    }
-                )
+                _schedule_db_write(_merge_continuation(), f"continuation {job_id}")
             
             # Set job result - merge with existing pages for full view
-            all_pages = existing_pages + final_pages
+            previous_pages = await previous_pages_task if previous_pages_task else existing_pages
+            all_pages = previous_pages + final_pages
             continuation_job.result = {
                 "title": project.get("title"),
                 "pages": all_pages,  # All pages for canvas to display
@@ -2411,12 +2618,14 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
             continuation_job.status = "completed"
             continuation_job.progress = 100
             continuation_job.current_step = "Continuation complete!"
+            await publish_job(continuation_job)
             
         except Exception as e:
-            import traceback
-            print(f"❌ Continuation failed: {traceback.format_exc()}")
+            # logger.exception formats the traceback only if a handler emits it
+            logger.exception("❌ Continuation failed for job %s", job_id)
             continuation_job.status = "failed"
             continuation_job.error = str(e)
+            await publish_job(continuation_job)
     
     # Start background task
     background_tasks.add_task(run_continuation)
@@ -2436,28 +2645,184 @@ async def continue_chapter(job_id: str, request: ContinueChapterRequest, backgro
 # Download API (with dialogue rendering on images)
 # ============================================
 
+# Process pool for page rendering, created on first PDF export
+_render_pool = None
+
+# Pages are downsampled to this resolution before embedding (A4 @ 200 DPI ~ 1654x2339)
+PDF_TARGET_DPI = 200
+
+
+def _get_render_pool():
+    """Lazily create the shared page-render process pool."""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor()
+    return _render_pool
+
+
+_BUBBLE_KEY = re.compile(r"page-(\d+)-panel-(\d+)")
+
+
+@lru_cache(maxsize=128)
+def _parse_bubbles(dialogues: str) -> dict:
+    """
+    Parse the editor's dialogues JSON into {(page_num, panel_idx): [bubbles]}.
+    
+    Cached on the raw string, so repeated PDF/ZIP downloads of the same edit
+    skip the parse. The result is shared between requests - don't mutate it.
+    """
+    try:
+        raw = json.loads(dialogues)
+    except ValueError:
+        return {}
+    if not isinstance(raw, dict):
+        return {}
+    
+    bubbles = {}
+    for key, panel_dialogues in raw.items():
+        match = _BUBBLE_KEY.fullmatch(key)
+        if match and panel_dialogues:
+            bubbles[(int(match.group(1)), int(match.group(2)))] = panel_dialogues
+    return bubbles
+
+
+def _layout_grid(layout) -> tuple:
+    """Parse a "COLSxROWS" layout into (cols, rows); 2x2 for anything else (e.g. "dynamic")."""
+    try:
+        cols, rows = (int(n) for n in str(layout).split("x"))
+    except ValueError:
+        return (2, 2)
+    if cols < 1 or rows < 1:
+        return (2, 2)
+    return (cols, rows)
+
+
+def _page_has_bubbles(page_idx: int, page: dict, bubble_data: dict, grid: tuple) -> bool:
+    """Whether any panel on this page has dialogue to draw."""
+    page_num = page.get("page_number", page_idx + 1)
+    return any(
+        (page_num, panel_idx) in bubble_data
+        for panel_idx in range(grid[0] * grid[1])
+    )
+
+
+# ZIP export reads each source image in 1 MiB chunks (zipstream-ng's own add_path reads 64 KiB)
+ZIP_READ_CHUNK = 1 << 20
+
+
+def _iter_file(path: str, chunk_size: int = ZIP_READ_CHUNK):
+    """Yield a file's bytes in chunk_size reads (sync - Starlette pulls it in its threadpool)."""
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def _image_exists(image_path: str, output_dir: Path, existing: set) -> bool:
+    """Check a page image against a directory listing, stat-ing only files outside it."""
+    if not image_path:
+        return False
+    path = Path(image_path)
+    if path.parent == output_dir:
+        return path.name in existing
+    return path.exists()
+
+
+def _build_pdf(
+    pages: list,
+    bubble_data: dict,
+    output_dir: Path,
+    lossless: bool = False,
+    jpeg_quality: int = 90,
+    grid: tuple = (2, 2)
+) -> bytes:
+    """
+    Render dialogue bubbles onto each page image and assemble an A4 PDF.
+    
+    Pages are drawn + encoded in parallel worker processes; the reportlab
+    canvas isn't thread-safe, so assembly stays on this thread.
+    Blocking - call via asyncio.to_thread.
+    """
+    # Export-only dependencies (reportlab, PIL/numpy) - imported on first use
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+    from src.dialogue.pdf_render import render_page
+    
+    page_width, page_height = A4
+    target_size = (int(page_width * PDF_TARGET_DPI / 72), int(page_height * PDF_TARGET_DPI / 72))
+    
+    # One directory listing instead of a stat() per page
+    existing = {entry.name for entry in os.scandir(output_dir)}
+    present = [
+        i for i, page in enumerate(pages)
+        if _image_exists(page.get("page_image", ""), output_dir, existing)
+    ]
+    
+    # Only pages that actually carry bubbles need a PIL decode/draw/encode pass
+    to_render = [i for i in present if _page_has_bubbles(i, pages[i], bubble_data, grid)]
+    rendered = dict(zip(to_render, _get_render_pool().map(
+        render_page, to_render, [pages[i] for i in to_render],
+        repeat(bubble_data), repeat(lossless), repeat(jpeg_quality), repeat(target_size), repeat(grid)
+    )))
+    
+    # Create PDF in memory
+    pdf_buffer = BytesIO()
+    pdf = canvas.Canvas(pdf_buffer, pagesize=A4)
+    
+    for page_idx in present:
+        if page_idx in rendered:
+            blob = rendered[page_idx]
+            if blob is None:
+                continue
+            image = ImageReader(BytesIO(blob))
+        else:
+            # No dialogue on this page - reportlab reads the original file directly
+            image = pages[page_idx]["page_image"]
+        # Draw on PDF page
+        pdf.drawImage(image, 0, 0, width=page_width, height=page_height)
+        pdf.showPage()
+    
+    pdf.save()
+    return pdf_buffer.getvalue()
+
+
+@app.on_event("shutdown")
+async def shutdown_render_pool():
+    """Stop page-render worker processes."""
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+
+
 @app.get("/api/download/{job_id}/{file_type}")
-async def download_file(job_id: str, file_type: str, dialogues: Optional[str] = None):
+async def download_file(job_id: str, file_type: str, dialogues: Optional[str] = None, lossless: bool = False):
     """
     Download manga as PNG, PDF, or ZIP.
     If dialogues JSON is provided, renders them onto the images.
+    PDF pages are embedded as JPEG unless ?lossless=1 is passed.
     """
-    from pathlib import Path
-    from io import BytesIO
-    import json
-    
     output_dir = Path("outputs") / job_id
     
-    # V4: Fallback chain - check memory, then filesystem
-    job = jobs.get(job_id)
+    # PNG only needs the first page - serve it straight off disk when present
+    if file_type == "png":
+        first_page_image = output_dir / "manga_page_01.png"
+        if first_page_image.exists():
+            return FileResponse(first_page_image, media_type="image/png", filename=f"{job_id}_page1.png")
+    
+    # V4: Fallback chain - check memory/Redis, then filesystem
+    job = await get_job(job_id)
     result = None
     
     if job and job.result:
         result = job.result
     elif output_dir.exists():
         # Fallback: load from filesystem if server reloaded
-        # Reconstruct minimal result from files
-        page_files = sorted(output_dir.glob("manga_page_*.png"))
+        # Reconstruct minimal result from the page manifest (or a folder scan)
+        manifest_path = output_dir / "manifest.json"
+        try:
+            async with aiofiles.open(manifest_path, "rb") as f:
+                page_files = orjson.loads(await f.read())["pages"]
+        except (OSError, orjson.JSONDecodeError, KeyError):
+            page_files = await asyncio.to_thread(lambda: sorted(output_dir.glob("manga_page_*.png")))
         if page_files:
             result = {
                 "pages": [
@@ -2477,12 +2842,7 @@ async def download_file(job_id: str, file_type: str, dialogues: Optional[str] =
         raise HTTPException(status_code=404, detail="Output directory not found")
     
     # Parse dialogues if provided
-    bubble_data = {}
-    if dialogues:
-        try:
-            bubble_data = json.loads(dialogues)
-        except:
-            pass
+    bubble_data = _parse_bubbles(dialogues) if dialogues else {}
     
     if file_type == "png":
         # Return first page as PNG
@@ -2496,221 +2856,59 @@ async def download_file(job_id: str, file_type: str, dialogues: Optional[str] =
     
     elif file_type == "pdf":
         # Generate PDF with dialogues rendered on images
+        pages = result.get("pages", [])
+        if not pages:
+            raise HTTPException(status_code=404, detail="No pages to export")
+        
+        # No dialogues to draw - the PDF written at generation time is already the export
+        if not bubble_data:
+            pdf_path = result.get("pdf")
+            if pdf_path and Path(pdf_path).exists():
+                return FileResponse(pdf_path, media_type="application/pdf", filename=Path(pdf_path).name)
+        
+        # B&W screentones tolerate a lower JPEG quality than color art
+        jpeg_quality = 85 if result.get("style") == "bw_manga" else 90
+        grid = _layout_grid(result.get("layout", "2x2") or "2x2")
+        # Drawing + encoding is CPU-bound; keep it off the event loop
         try:
-            from PIL import Image, ImageDraw, ImageFont
-            from reportlab.lib.pagesizes import A4
-            from reportlab.pdfgen import canvas
-            from reportlab.lib.utils import ImageReader
-            
-            pages = result.get("pages", [])
-            if not pages:
-                raise HTTPException(status_code=404, detail="No pages to export")
-            
-            # Create PDF in memory
-            pdf_buffer = BytesIO()
-            pdf = canvas.Canvas(pdf_buffer, pagesize=A4)
-            page_width, page_height = A4
-            
-            for page_idx, page in enumerate(pages):
-                page_image_path = page.get("page_image", "")
-                if not page_image_path or not Path(page_image_path).exists():
-                    continue
-                
-                # Load and optionally render dialogues
-                img = Image.open(page_image_path)
-                
-                # Get dialogues for this page's panels
-                page_num = page.get("page_number", page_idx + 1)
-                panels = page.get("panels", [])
-                
-                for panel_idx in range(len(panels)):
-                    panel_id = f"page-{page_num}-panel-{panel_idx}"
-                    panel_dialogues = bubble_data.get(panel_id, [])
-                    
-                    if panel_dialogues:
-                        # Render dialogues on image
-                        draw = ImageDraw.Draw(img)
-                        
-                        # Get panel region (approximate based on grid)
-                        grid_cols = 2
-                        grid_rows = 2
-                        panel_w = img.width // grid_cols
-                        panel_h = img.height // grid_rows
-                        panel_x = (panel_idx % grid_cols) * panel_w
-                        panel_y = (panel_idx // grid_cols) * panel_h
-                        
-                        for bubble in panel_dialogues:
-                            # Calculate bubble position
-                            bx = panel_x + int((bubble.get("x", 50) / 100) * panel_w)
-                            by = panel_y + int((bubble.get("y", 50) / 100) * panel_h)
-                            text = bubble.get("text", "")
-                            style = bubble.get("style", "speech")
-                            
-                            if not text:
-                                continue
-                            
-                            # Try to load a font, fallback to default
-                            try:
-                                font = ImageFont.truetype("arial.ttf", 14)
-                            except:
-                                font = ImageFont.load_default()
-                            
-                            # Get text size
-                            text_bbox = draw.textbbox((0, 0), text, font=font)
-                            tw = text_bbox[2] - text_bbox[0]
-                            th = text_bbox[3] - text_bbox[1]
-                            
-                            # Draw bubble based on style - JJK-STYLE MATCHING CANVAS!
-                            padding = 10
-                            bubble_width = tw + padding * 2
-                            bubble_height = th + padding * 2
-                            bubble_x = bx - padding
-                            bubble_y = by - padding
-                            
-                            if style == "narrator":
-                                # Dark box with left accent (matches canvas)
-                                draw.rectangle([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
-                                              fill=(30, 30, 35))
-                                draw.rectangle([bubble_x, bubble_y, bubble_x + 4, bubble_y + bubble_height], 
-                                              fill=(100, 100, 120))
-                                draw.text((bx + 4, by), text, fill="white", font=font)
-                                
-                            elif style == "thought":
-                                # Cloud-like with bumps + thought trail
-                                import math
-                                # Main ellipse
-                                draw.ellipse([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
-                                            fill="white", outline="gray", width=2)
-                                # Cloud bumps
-                                cx = bubble_x + bubble_width // 2
-                                cy = bubble_y + bubble_height // 2
-                                bump_size = min(bubble_width, bubble_height) // 4
-                                for angle in [0, 60, 120, 180, 240, 300]:
-                                    bpx = cx + int((bubble_width//2 - bump_size//3) * math.cos(math.radians(angle)))
-                                    bpy = cy + int((bubble_height//2 - bump_size//3) * math.sin(math.radians(angle)))
-                                    draw.ellipse([bpx - bump_size//2, bpy - bump_size//2, 
-                                                bpx + bump_size//2, bpy + bump_size//2], 
-                                                fill="white", outline="gray", width=1)
-                                # Thought trail
-                                draw.ellipse([bubble_x + 5, bubble_y + bubble_height + 2, 
-                                             bubble_x + 12, bubble_y + bubble_height + 9], fill="white", outline="gray", width=1)
-                                draw.ellipse([bubble_x, bubble_y + bubble_height + 10, 
-                                             bubble_x + 6, bubble_y + bubble_height + 16], fill="white", outline="gray", width=1)
-                                draw.text((bx, by), text, fill="gray", font=font)
-                                
-                            elif style == "shout":
-                                # AGGRESSIVE JJK-style SPIKY polygon! (MAINSTREAM QUALITY)
-                                import math
-                                import random
-                                points = []
-                                spikes = 14  # More spikes for aggressive look
-                                cx = bubble_x + bubble_width // 2
-                                cy = bubble_y + bubble_height // 2
-                                for i in range(spikes):
-                                    angle = (360 / spikes) * i - 90
-                                    if i % 2 == 0:
-                                        # Outer spike - DEEP and RANDOMIZED
-                                        r_x = bubble_width // 2 + 25 + random.randint(-5, 5)
-                                        r_y = bubble_height // 2 + 25 + random.randint(-5, 5)
-                                    else:
-                                        # Inner notch - AGGRESSIVE inward dip
-                                        r_x = bubble_width // 2 - 12
-                                        r_y = bubble_height // 2 - 12
-                                    px = cx + int(r_x * math.cos(math.radians(angle)))
-                                    py = cy + int(r_y * math.sin(math.radians(angle)))
-                                    points.append((px, py))
-                                draw.polygon(points, fill="white", outline="black", width=4)  # Thicker outline
-                                draw.text((bx, by), text, fill="black", font=font)
-                                
-                            elif style == "whisper":
-                                # Dashed ellipse border
-                                import math
-                                # White fill first
-                                draw.ellipse([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
-                                            fill="white", outline=None)
-                                # Dashed border using line segments
-                                cx = bubble_x + bubble_width // 2
-                                cy = bubble_y + bubble_height // 2
-                                dash_count = 24
-                                for i in range(dash_count):
-                                    if i % 2 == 0:  # Dash
-                                        a1 = (360 / dash_count) * i
-                                        a2 = (360 / dash_count) * (i + 0.6)
-                                        x1 = cx + int((bubble_width // 2) * math.cos(math.radians(a1)))
-                                        y1 = cy + int((bubble_height // 2) * math.sin(math.radians(a1)))
-                                        x2 = cx + int((bubble_width // 2) * math.cos(math.radians(a2)))
-                                        y2 = cy + int((bubble_height // 2) * math.sin(math.radians(a2)))
-                                        draw.line([(x1, y1), (x2, y2)], fill="gray", width=1)
-                                draw.text((bx, by), text, fill="gray", font=font)
-                                
-                            else:
-                                # Regular speech bubble - clean ellipse
-                                draw.ellipse([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
-                                            fill="white", outline="black", width=2)
-                                draw.text((bx, by), text, fill="black", font=font)
-                                
-                                # Directional tail based on speaker_position
-                                speaker_pos = bubble.get("speakerPosition", bubble.get("speaker_position", "center"))
-                                bubble_cx = bx + tw // 2
-                                bubble_cy = by + th // 2
-                                
-                                if speaker_pos == "left":
-                                    draw.polygon([
-                                        (bubble_x, bubble_cy - 5),
-                                        (bubble_x - 12, bubble_cy + 5),
-                                        (bubble_x, bubble_cy + 5)
-                                    ], fill="white", outline="black")
-                                elif speaker_pos == "right":
-                                    draw.polygon([
-                                        (bubble_x + bubble_width, bubble_cy - 5),
-                                        (bubble_x + bubble_width + 12, bubble_cy + 5),
-                                        (bubble_x + bubble_width, bubble_cy + 5)
-                                    ], fill="white", outline="black")
-                                else:
-                                    draw.polygon([
-                                        (bubble_cx, bubble_y + bubble_height),
-                                        (bubble_cx + 10, bubble_y + bubble_height + 15),
-                                        (bubble_cx - 5, bubble_y + bubble_height)
-                                    ], fill="white", outline="black")
-                
-                # Save to temp and add to PDF
-                img_buffer = BytesIO()
-                img.save(img_buffer, format="PNG")
-                img_buffer.seek(0)
-                
-                # Draw on PDF page
-                pdf.drawImage(ImageReader(img_buffer), 0, 0, width=page_width, height=page_height)
-                pdf.showPage()
-            
-            pdf.save()
-            pdf_buffer.seek(0)
-            
-            return StreamingResponse(
-                pdf_buffer,
-                media_type="application/pdf",
-                headers={"Content-Disposition": f"attachment; filename={job_id}_manga.pdf"}
+            pdf_bytes = await asyncio.to_thread(
+                _build_pdf, pages, bubble_data, output_dir, lossless, jpeg_quality, grid
             )
         except ImportError as e:
-            # Fallback if reportlab not available
             raise HTTPException(status_code=500, detail=f"PDF generation requires reportlab: {e}")
+        
+        return StreamingResponse(
+            BytesIO(pdf_bytes),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename={job_id}_manga.pdf"}
+        )
     
     elif file_type == "zip":
-        # Create ZIP with all images
-        import zipfile
-        from fastapi.responses import StreamingResponse
-        
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in output_dir.glob("*.png"):
-                zf.write(f, f.name)
-            for f in output_dir.glob("*.jpg"):
-                zf.write(f, f.name)
-        
-        zip_buffer.seek(0)
+        # Stream a ZIP of all images straight from disk (no in-memory buffer).
+        # PNG/JPG are already compressed - re-deflating costs CPU for <1% savings.
+        # Starlette pulls each chunk of this sync iterator in its threadpool, so
+        # 1 MiB file reads overlap with socket writes without blocking the loop.
+        try:
+            from zipstream import ZipStream, ZIP_STORED
+        except ImportError as e:
+            raise HTTPException(status_code=500, detail=f"ZIP export requires zipstream-ng: {e}")
+        
+        zs = ZipStream(sized=True, compress_type=ZIP_STORED)
+        # One directory listing gives both the names and the sizes a sized stream needs
+        images = await asyncio.to_thread(lambda: sorted(
+            (entry for entry in os.scandir(output_dir) if entry.name.endswith((".png", ".jpg"))),
+            key=lambda entry: (entry.name.endswith(".jpg"), entry.name)
+        ))
+        for entry in images:
+            zs.add(_iter_file(entry.path), entry.name, size=entry.stat().st_size)
+        
         return StreamingResponse(
-            zip_buffer,
+            zs,
             media_type="application/zip",
-            headers={"Content-Disposition": f"attachment; filename={job_id}_assets.zip"}
+            headers={
+                "Content-Length": str(len(zs)),
+                "Content-Disposition": f"attachment; filename={job_id}_assets.zip"
+            }
         )
     
     raise HTTPException(status_code=400, detail="Invalid file type. Use: png, pdf, or zip")
@@ -2721,7 +2919,7 @@ async def download_file(job_id: str, file_type: str, dialogues: Optional[str] =
 # ============================================
 
 # Mount outputs directory for image serving
-app.mount("/outputs", StaticFiles(directory="outputs"), name="outputs")
+app.mount("/outputs", StaticFiles(directory="outputs", check_dir=False), name="outputs")
 
 
 # ============================================
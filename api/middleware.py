@@ -6,39 +6,93 @@ Professional API protection
 
 from fastapi import Request, HTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 import time
 
+from src.database.redis_store import RedisJobStore
+
+# Fixed-window counter: one INCR per request, expiry set on the first hit
+RATE_LIMIT_LUA = """
+local c = redis.call('INCR', KEYS[1])
+if c == 1 then redis.call('PEXPIRE', KEYS[1], ARGV[1]) end
+return c
+"""
+
+# Generated images are served from here; they skip rate limiting and validation
+STATIC_PREFIX = "/outputs/"
+
+
 class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple in-memory rate limiting (use Redis in production)."""
+    """Rate limiting shared across workers via Redis, in-memory when Redis is off."""
     
     def __init__(self, app, calls: int = 10, period: int = 60):
         super().__init__(app)
         self.calls = calls  # Max calls per period
         self.period = period  # Period in seconds
-        self.clients = defaultdict(list)  # IP -> list of timestamps
+        self.clients = defaultdict(deque)  # IP -> timestamps, oldest first
+        self._next_sweep = time.time() + period
+        self._script = None
+        self._script_client = None
+    
+    async def _redis_count(self, client_ip: str, now: float) -> int:
+        """Requests from this IP in the current window, counted in Redis (one RTT)."""
+        client = RedisJobStore.client
+        if self._script_client is not client:
+            self._script = client.register_script(RATE_LIMIT_LUA)
+            self._script_client = client
+        window = int(now // self.period)
+        return await self._script(
+            keys=[f"rl:{client_ip}:{window}"],
+            args=[self.period * 1000],
+        )
+    
+    def _sweep(self, cutoff: float):
+        """Drop IPs with no requests inside the window so the dict can't grow forever."""
+        stale = [ip for ip, dq in self.clients.items() if not dq or dq[-1] < cutoff]
+        for ip in stale:
+            del self.clients[ip]
     
     async def dispatch(self, request: Request, call_next):
+        if request.scope["path"].startswith(STATIC_PREFIX):
+            return await call_next(request)
+        
         # Get client IP
         client_ip = request.client.host
         
-        # Clean old timestamps
         now = time.time()
-        self.clients[client_ip] = [
-            ts for ts in self.clients[client_ip]
-            if now - ts < self.period
-        ]
+        if RedisJobStore.client is not None:
+            try:
+                count = await self._redis_count(client_ip, now)
+            except Exception as e:
+                print(f"⚠️ Redis rate limit failed (falling back to in-memory): {e}")
+            else:
+                if count > self.calls:
+                    raise HTTPException(
+                        status_code=429,
+                        detail=f"Rate limit exceeded. Max {self.calls} requests per {self.period}s"
+                    )
+                return await call_next(request)
+        
+        # Evict expired timestamps from the front (oldest first)
+        cutoff = now - self.period
+        if now >= self._next_sweep:
+            self._sweep(cutoff)
+            self._next_sweep = now + self.period
+        
+        timestamps = self.clients[client_ip]
+        while timestamps and timestamps[0] <= cutoff:
+            timestamps.popleft()
         
         # Check rate limit
-        if len(self.clients[client_ip]) >= self.calls:
+        if len(timestamps) >= self.calls:
             raise HTTPException(
                 status_code=429,
                 detail=f"Rate limit exceeded. Max {self.calls} requests per {self.period}s"
             )
         
         # Add current timestamp
-        self.clients[client_ip].append(now)
+        timestamps.append(now)
         
         # Process request
         response = await call_next(request)
@@ -51,6 +105,9 @@ class RequestValidationMiddleware(BaseHTTPMiddleware):
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB
     
     async def dispatch(self, request: Request, call_next):
+        if request.scope["path"].startswith(STATIC_PREFIX):
+            return await call_next(request)
+        
         # Check content length
         if request.headers.get("content-length"):
             content_length = int(request.headers["content-length"])
@@ -8,6 +8,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional
 import os
+import hmac
+import asyncio
 import hashlib
 import secrets
 from datetime import datetime, timedelta
@@ -29,11 +31,49 @@ class AuthResponse(BaseModel):
     token: str
     user: dict
 
-def hash_password(password: str) -> str:
-    """Hash password with salt."""
+# PBKDF2-HMAC-SHA256 work factor (OWASP 2023 recommendation)
+PASSWORD_ITERATIONS = 600_000
+
+
+def hash_password(password: str, salt: bytes, iterations: int = PASSWORD_ITERATIONS) -> str:
+    """Hash password with a per-user salt (PBKDF2-HMAC-SHA256 via OpenSSL)."""
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations).hex()
+
+
+def legacy_hash_password(password: str) -> str:
+    """Old single-salt SHA-256 scheme - only used to verify and upgrade existing users."""
     salt = SECRET_KEY[:16]
     return hashlib.sha256(f"{salt}{password}".encode()).hexdigest()
 
+
+async def make_password_fields(password: str) -> dict:
+    """Salt + hash a password for storage on the user doc."""
+    salt = secrets.token_bytes(16)
+    # Deliberately slow (hundreds of ms) - keep it off the event loop
+    digest = await asyncio.to_thread(hash_password, password, salt)
+    return {
+        "password_salt": salt.hex(),
+        "password_iterations": PASSWORD_ITERATIONS,
+        "password_hash": digest,
+    }
+
+
+async def verify_password(password: str, user_doc: dict) -> bool:
+    """Check a password against a user doc (per-user salted, wrapped legacy, or legacy)."""
+    stored = user_doc.get("password_hash", "")
+    if "password_salt" not in user_doc:
+        return hmac.compare_digest(stored, legacy_hash_password(password))
+    
+    # Migrated users (scripts/migrate_password_hashes.py) hold PBKDF2(legacy digest)
+    secret = legacy_hash_password(password) if user_doc.get("password_wrapped") else password
+    digest = await asyncio.to_thread(
+        hash_password,
+        secret,
+        bytes.fromhex(user_doc["password_salt"]),
+        user_doc.get("password_iterations", PASSWORD_ITERATIONS),
+    )
+    return hmac.compare_digest(stored, digest)
+
 def create_token(user_id: str) -> str:
     """Create a simple session token."""
     # In production, use proper JWT with expiry
@@ -64,7 +104,7 @@ async def register(user: UserRegister):
         # Create user
         user_doc = {
             "email": user.email,
-            "password_hash": hash_password(user.password),
+            **await make_password_fields(user.password),
             "created_at": datetime.now().isoformat(),
             "plan": "free"
         }
@@ -109,9 +149,19 @@ async def login(user: UserLogin):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
         # Check password
-        if user_doc["password_hash"] != hash_password(user.password):
+        if not await verify_password(user.password, user_doc):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
+        # Upgrade legacy/wrapped hashes now that we know the plaintext
+        if "password_salt" not in user_doc or user_doc.get("password_wrapped"):
+            await Database.db.users.update_one(
+                {"_id": user_doc["_id"]},
+                {
+                    "$set": await make_password_fields(user.password),
+                    "$unset": {"password_wrapped": ""}
+                }
+            )
+        
         user_id = str(user_doc["_id"])
         
         return AuthResponse(
@@ -11,7 +11,10 @@ Uses Story Director AI for:
 
 import json
 import os
+import re
 import time
+
+import orjson
 from pathlib import Path
 from typing import List, Dict, Optional, Any, Callable
 from dataclasses import dataclass, field
@@ -21,6 +24,9 @@ from scripts.layout_templates import LAYOUT_TEMPLATES, validate_template
 import inspect
 import asyncio
 
+# story_state.json / story_blueprint.json are human-inspected, so keep them indented
+STATE_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
 
 @dataclass
 class MangaConfig:
@@ -71,17 +77,13 @@ class ComfyUIGeneratorWrapper:
     ACTION_KEYWORDS = ['fight', 'battle', 'attack', 'explosion', 'running', 
                        'jumping', 'punch', 'kick', 'dodge', 'clash', 'combat',
                        'sword', 'weapon', 'action', 'charging', 'flying']
+    # One case-insensitive scan instead of lower() + a substring search per keyword
+    ACTION_PATTERN = re.compile('|'.join(ACTION_KEYWORDS), re.IGNORECASE)
     
-    def _is_action_scene(self, prompt: str) -> bool:
-        """Detect if prompt describes an action scene."""
-        prompt_lower = prompt.lower()
-        return any(kw in prompt_lower for kw in self.ACTION_KEYWORDS)
-    
-    def _strip_color_words(self, prompt: str) -> str:
-        """Remove color words from prompt for B/W mode."""
-        import re
-        # Replace color words with grayscale alternatives
-        color_patterns = [
+    # Color words -> grayscale alternatives for B/W mode (compiled once, applied per panel)
+    COLOR_PATTERNS = [
+        (re.compile(pattern, re.IGNORECASE), replacement)
+        for pattern, replacement in [
             (r'\b(pink|magenta)\s*(hair|haired)', 'light grey hair'),
             (r'\b(blue|azure|cyan)\s*(hair|haired)', 'dark grey hair'),
             (r'\b(red|crimson|scarlet)\s*(hair|haired)', 'dark hair'),
@@ -93,9 +95,17 @@ class ComfyUIGeneratorWrapper:
             # Remove standalone color words
             (r'\b(vibrant|colorful|colored|coloured)\b', ''),
         ]
+    ]
+    
+    def _is_action_scene(self, prompt: str) -> bool:
+        """Detect if prompt describes an action scene."""
+        return self.ACTION_PATTERN.search(prompt) is not None
+    
+    def _strip_color_words(self, prompt: str) -> str:
+        """Remove color words from prompt for B/W mode."""
         result = prompt
-        for pattern, replacement in color_patterns:
-            result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+        for pattern, replacement in self.COLOR_PATTERNS:
+            result = pattern.sub(replacement, result)
         return result
     
     async def generate_image(
@@ -127,7 +137,10 @@ class ComfyUIGeneratorWrapper:
             print(f"   ⚡ Action scene detected: {prompt[:50]}...")
         
         full_prompt = f"{prompt}{style_suffix}"
-        actual_seed = seed if seed is not None else 42 + self._panel_counter
+        # Reserve this panel's number up front - pages now generate several panels at once
+        panel_number = self._panel_counter
+        self._panel_counter += 1
+        actual_seed = seed if seed is not None else 42 + panel_number
         
         for attempt in range(max_retries):
             try:
@@ -139,15 +152,13 @@ class ComfyUIGeneratorWrapper:
                     width=width, 
                     height=height, 
                     seed=actual_seed, 
-                    panel_id=f"panel_{self._panel_counter}"
+                    panel_id=f"panel_{panel_number}"
                 )
                 
-                # Save to file
+                # Save to file (off the event loop so other in-flight panels keep going)
                 output_path = self.output_dir / filename
-                with open(output_path, 'wb') as f:
-                    f.write(image_bytes)
+                await asyncio.to_thread(output_path.write_bytes, image_bytes)
                 
-                self._panel_counter += 1
                 print(f"   ✅ Saved: {filename}")
                 return str(output_path)
                 
@@ -219,6 +230,9 @@ class MangaGenerator:
     - Smart bubble placement for dialogue
     """
     
+    # Panel images generated concurrently per page
+    PANEL_CONCURRENCY = 4
+    
     def __init__(self, config: MangaConfig):
         self.config = config
         self.output_dir = Path(config.output_dir)
@@ -321,6 +335,19 @@ class MangaGenerator:
         chapter_nums = set(p.get('chapter_number', 1) for p in pages)
         return len(chapter_nums) if chapter_nums else 1
     
+    def _write_page_manifest(self):
+        """
+        Save manifest.json listing all composed page images in order.
+        
+        Covers pages from earlier runs too, so continuations keep a complete list.
+        """
+        try:
+            page_files = sorted(self.output_dir.glob("manga_page_*.png"))
+            with open(self.output_dir / "manifest.json", 'w', encoding='utf-8') as f:
+                json.dump({"pages": [str(p) for p in page_files]}, f)
+        except Exception as e:
+            print(f"⚠️ Failed to write page manifest: {e}")
+    
     def _save_story_blueprint(self, chapter_plan: Dict, story_prompt: str, characters: Optional[List[Dict]]):
         """
         Save complete story state for save/continue/edit flows.
@@ -331,7 +358,6 @@ class MangaGenerator:
         - Continuation state for "continue story" feature
         """
         from datetime import datetime
-        import json
         import uuid
         
         try:
@@ -399,20 +425,18 @@ class MangaGenerator:
             
             # Save to output directory
             state_path = self.output_dir / "story_state.json"
-            with open(state_path, 'w', encoding='utf-8') as f:
-                json.dump(story_state, f, indent=2, ensure_ascii=False)
+            state_path.write_bytes(orjson.dumps(story_state, option=STATE_JSON_OPTIONS))
             
             # Also save legacy format for backwards compatibility
             legacy_path = self.output_dir / "story_blueprint.json"
-            with open(legacy_path, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "timestamp": story_state["created_at"],
-                    "original_prompt": story_prompt,
-                    "provided_characters": characters or [],
-                    "config": story_state["metadata"],
-                    "chapter_plan": chapter_plan,
-                    "panel_prompts": story_state["panel_prompts"]
-                }, f, indent=2, ensure_ascii=False)
+            legacy_path.write_bytes(orjson.dumps({
+                "timestamp": story_state["created_at"],
+                "original_prompt": story_prompt,
+                "provided_characters": characters or [],
+                "config": story_state["metadata"],
+                "chapter_plan": chapter_plan,
+                "panel_prompts": story_state["panel_prompts"]
+            }, option=STATE_JSON_OPTIONS))
             
             print(f"📝 Story state saved: {state_path}")
             print(f"📝 Legacy blueprint saved: {legacy_path}")
@@ -531,6 +555,18 @@ class MangaGenerator:
                 page_data  # V4.2: Pass page_data for layout template
             )
             
+            page_record = {
+                'page_number': page_num,
+                'summary': page_data.get('page_summary', ''),
+                'archetype': page_data.get('archetype', 'DEFAULT'),
+                'layout_template': page_data.get('layout_template', '2x2_grid'),
+                # V4 FIX: Include panel data with x,y,w,h geometry for frontend
+                'panels': page_data.get('panels', []),  # Full panel objects with geometry!
+                'panel_paths': [str(p) for p in panel_paths],  # Legacy: file paths
+                'page_image': page_path,
+                'dialogue': dialogue_data  # Store for canvas editor
+            }
+            
             if progress_callback:
                 # Page complete - Send path for live preview
                 current_prog = 20 + int(70 * page_num / self.config.pages)
@@ -539,21 +575,12 @@ class MangaGenerator:
                     "page_num": page_num,
                     "image_path": str(page_path),
                     "panels": [str(p) for p in panel_paths],
-                    "dialogue": dialogue_data  # NEW: Include dialogue JSON
+                    "dialogue": dialogue_data,  # NEW: Include dialogue JSON
+                    "page": page_record  # Same record as result["pages"], for incremental saves
                 }
                 progress_callback(f"Finished page {page_num}...", current_prog, data)
             
-            chapter_pages.append({
-                'page_number': page_num,
-                'summary': page_data.get('page_summary', ''),
-                'archetype': page_data.get('archetype', 'DEFAULT'),
-                'layout_template': page_data.get('layout_template', '2x2_grid'),
-                # V4 FIX: Include panel data with x,y,w,h geometry for frontend
-                'panels': page_data.get('panels', []),  # Full panel objects with geometry!
-                'panel_paths': [str(p) for p in panel_paths],  # Legacy: file paths
-                'page_image': page_path,
-                'dialogue': dialogue_data  # Store for canvas editor
-            })
+            chapter_pages.append(page_record)
         
         # Step 3: Generate Cover Image
         # V4.7: Progress feedback so frontend doesn't appear stuck
@@ -597,14 +624,15 @@ class MangaGenerator:
         # Step 4: Create PDF
         pdf_path = self._create_pdf(chapter_pages)
         
+        # Step 4.1: Write page manifest so downloads don't rescan the folder
+        self._write_page_manifest()
+        
         # Step 4.5: Update story_state.json with final panel geometry
         # This ensures x,y,w,h data is saved for canvas panel selection
         try:
-            import json
             state_path = self.output_dir / "story_state.json"
             if state_path.exists():
-                with open(state_path, 'r', encoding='utf-8') as f:
-                    story_state = json.load(f)
+                story_state = orjson.loads(state_path.read_bytes())
                 
                 # MERGE chapters: Get existing chapters and append/update pages
                 existing_chapters = story_state.get("chapters", [])
@@ -642,8 +670,7 @@ class MangaGenerator:
                         "pages": chapter_pages
                     }]
                 
-                with open(state_path, 'w', encoding='utf-8') as f:
-                    json.dump(story_state, f, indent=2, ensure_ascii=False)
+                state_path.write_bytes(orjson.dumps(story_state, option=STATE_JSON_OPTIONS))
                 print(f"📝 Updated story_state with panel geometry ({len(story_state['chapters'][0]['pages'])} pages)")
         except Exception as e:
             print(f"⚠️ Failed to update story_state with geometry: {e}")
@@ -733,9 +760,10 @@ class MangaGenerator:
                 panel['x'] = template_panel.get('x', 0)
                 panel['y'] = template_panel.get('y', 0)
         
-        generated_files = []
+        # Panels are network-bound on the image API - run a few at once instead of back to back
+        semaphore = asyncio.Semaphore(self.PANEL_CONCURRENCY)
         
-        for i, panel in enumerate(panels, 1):
+        async def _generate_panel(i: int, panel: Dict) -> Optional[str]:
             panel_id = f"p{page_num:02d}_panel_{i:02d}"
             filename = f"{panel_id}.png"
             
@@ -782,27 +810,23 @@ class MangaGenerator:
             
             # Hybrid Sync/Async Handler
             gen_func = self.image_generator.generate_image
-            if inspect.iscoroutinefunction(gen_func):
-                result = await gen_func(
-                    prompt=prompt,
-                    filename=filename,
-                    width=img_width,
-                    height=img_height,
-                    style=self.config.style,
-                    seed=page_num * 100 + i
-                )
-            else:
-                result = gen_func(
-                    prompt=prompt,
-                    filename=filename,
-                    width=img_width,
-                    height=img_height,
-                    style=self.config.style,
-                    seed=page_num * 100 + i
-                )
+            gen_kwargs = dict(
+                prompt=prompt,
+                filename=filename,
+                width=img_width,
+                height=img_height,
+                style=self.config.style,
+                seed=page_num * 100 + i
+            )
+            async with semaphore:
+                if inspect.iscoroutinefunction(gen_func):
+                    result = await gen_func(**gen_kwargs)
+                else:
+                    # Sync generators block on HTTP - keep them off the event loop
+                    result = await asyncio.to_thread(gen_func, **gen_kwargs)
+                await asyncio.sleep(1)  # Rate limiting (per slot)
             
             if result:
-                generated_files.append(result)
                 print(f"   ✅ {filename}")
                 
                 if progress_callback:
@@ -817,9 +841,14 @@ class MangaGenerator:
             else:
                 print(f"   ❌ Failed: {filename}")
             
-            time.sleep(1)  # Rate limiting
+            return result
+        
+        results = await asyncio.gather(*(
+            _generate_panel(i, panel) for i, panel in enumerate(panels, 1)
+        ))
         
-        return generated_files
+        # Keep panel order; failed panels are dropped as before
+        return [result for result in results if result]
     
     def _add_dialogue(self, panel_paths: List[str], page_data: Dict, page_num: int) -> tuple[List[str], List[Dict]]:
         """
@@ -949,9 +978,12 @@ class MangaGenerator:
         if self.config.style == "bw_manga":
             page = self._apply_screentone_filter(page)
         
-        # Save
+        # Save - screentoned pages are pure black/white, so store them 1-bit
+        # (lossless, and far fewer bytes on disk and over the wire than RGB)
         output_path = self.output_dir / f"manga_page_{page_num:02d}.png"
-        page.save(output_path)
+        if self.config.style == "bw_manga":
+            page = page.convert("1", dither=Image.Dither.NONE)
+        page.save(output_path, optimize=True)
         print(f"   ✅ Saved: {output_path}")
         
         return str(output_path)
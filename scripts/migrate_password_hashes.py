@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Password Hash Migration
+
+Users registered before per-user salting store sha256(shared_salt + password).
+Those can't be re-hashed without the plaintext, so this wraps each stored
+digest in PBKDF2 with a fresh per-user salt and flags it password_wrapped.
+Login verifies wrapped users by hashing the legacy digest first, then
+upgrades them to the plain per-user scheme.
+
+PBKDF2 runs in OpenSSL with the GIL released, so each batch is hashed in
+parallel on a thread pool (one lane per core) and written back with a
+single bulk_write.
+
+Usage:
+    python -m scripts.migrate_password_hashes [--batch-size 256] [--dry-run]
+"""
+
+import os
+import asyncio
+import argparse
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import UpdateOne
+
+from api.routes.auth import hash_password, PASSWORD_ITERATIONS
+from src.database.mongodb import Database
+
+# Users still on the shared-salt SHA-256 scheme
+LEGACY_QUERY = {"password_salt": {"$exists": False}, "password_hash": {"$exists": True}}
+
+
+async def migrate_batch(batch: list, pool: ThreadPoolExecutor, dry_run: bool) -> int:
+    """Wrap one batch of legacy digests and write them back in one round trip."""
+    loop = asyncio.get_running_loop()
+    salts = [secrets.token_bytes(16) for _ in batch]
+    digests = await asyncio.gather(*(
+        loop.run_in_executor(pool, hash_password, doc["password_hash"], salt)
+        for doc, salt in zip(batch, salts)
+    ))
+    
+    if dry_run:
+        return len(batch)
+    
+    ops = [
+        UpdateOne(
+            # Re-check the filter so a doc seen twice by the cursor isn't wrapped twice
+            {"_id": doc["_id"], "password_salt": {"$exists": False}},
+            {"$set": {
+                "password_salt": salt.hex(),
+                "password_iterations": PASSWORD_ITERATIONS,
+                "password_hash": digest,
+                "password_wrapped": True,
+            }}
+        )
+        for doc, salt, digest in zip(batch, salts, digests)
+    ]
+    result = await Database.db.users.bulk_write(ops, ordered=False)
+    return result.modified_count
+
+
+async def migrate(batch_size: int, dry_run: bool):
+    """Wrap every legacy password hash in the users collection."""
+    await Database.connect_db()
+    if Database.db is None:
+        print("❌ MongoDB unavailable - nothing migrated")
+        return
+    
+    total = await Database.db.users.count_documents(LEGACY_QUERY)
+    print(f"🔐 {total} users on the legacy password scheme")
+    
+    migrated = 0
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        cursor = Database.db.users.find(LEGACY_QUERY, {"_id": 1, "password_hash": 1}).batch_size(batch_size)
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                migrated += await migrate_batch(batch, pool, dry_run)
+                batch = []
+                print(f"   {migrated}/{total}")
+        if batch:
+            migrated += await migrate_batch(batch, pool, dry_run)
+    
+    action = "Would migrate" if dry_run else "Migrated"
+    print(f"✅ {action} {migrated} users")
+    await Database.close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wrap legacy password hashes in per-user PBKDF2")
+    parser.add_argument("--batch-size", type=int, default=256, help="Users hashed and written per round trip")
+    parser.add_argument("--dry-run", action="store_true", help="Hash but don't write anything")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size, args.dry_run))
@@ -13,6 +13,13 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass, field
 
 
+# Style tags appended when a panel has no registered characters
+STYLE_SUFFIXES = {
+    "bw_manga": ", manga style, monochrome, ink lineart, screentone, high contrast",
+    "color_anime": ", anime style, vibrant, cel shading, studio quality",
+}
+
+
 @dataclass
 class CharacterDNA:
     """Visual DNA for a character - consistent tags for all panels."""
@@ -34,14 +41,15 @@ class CharacterDNA:
         """
         tags = []
         
-        # Parse appearance for key features
+        # Parse appearance for key features (lowercase + tokenize once, shared below)
         appearance_lower = self.appearance.lower()
+        words = appearance_lower.split()
         
         # Hair features
         if "hair" in appearance_lower:
             # Extract hair color/style
             hair_parts = []
-            for word in appearance_lower.split():
+            for word in words:
                 if word in ["black", "white", "silver", "gray", "grey", "blonde", "brown", "red", "pink", "blue", "purple", "green"]:
                     hair_parts.append(word)
                 if word in ["short", "long", "messy", "spiky", "straight", "curly", "wavy"]:
@@ -52,7 +60,7 @@ class CharacterDNA:
         
         # Eye features
         if "eye" in appearance_lower:
-            for word in appearance_lower.split():
+            for word in words:
                 if word in ["blue", "green", "brown", "gray", "grey", "red", "golden", "emerald", "amber"]:
                     tags.append(f"{word} eyes")
                     break
@@ -98,6 +106,7 @@ class CharacterDNAManager:
     def __init__(self, style: str = "bw_manga"):
         self.style = style
         self.characters: Dict[str, CharacterDNA] = {}
+        self._by_lower_name: Dict[str, CharacterDNA] = {}  # Lowercased once at registration
     
     def register_character(self, name: str, appearance: str, personality: str = "", role: str = "") -> CharacterDNA:
         """
@@ -120,6 +129,7 @@ class CharacterDNAManager:
         )
         dna.build_visual_tags(self.style)
         self.characters[name] = dna
+        self._by_lower_name[name.lower()] = dna
         print(f"   🧬 Character DNA registered: {name}")
         print(f"      Visual Tags: {dna.get_prompt_injection()}")
         return dna
@@ -141,26 +151,23 @@ class CharacterDNAManager:
         Returns:
             Enhanced prompt with character DNA injected
         """
-        # Collect DNA tags for all characters in this panel
-        char_tags = []
+        # Collect DNA tags for all characters in this panel, deduplicated in
+        # order (dict keys) straight from the tag lists - no join/split round trip
+        # Planners don't always match the registered casing ("kai" vs "Kai")
+        by_lower_name = self._by_lower_name
+        dna_tags = {}
         for char_name in characters_present:
-            tags = self.get_character_tags(char_name)
-            if tags:
-                char_tags.append(tags)
+            dna = by_lower_name.get(char_name.lower())
+            if dna is not None:
+                dna_tags.update(dict.fromkeys(dna.visual_tags))
         
-        if not char_tags:
+        if not dna_tags:
             # No characters or no DNA - add base style tags only
-            if self.style == "bw_manga":
-                return f"{base_prompt}, manga style, monochrome, ink lineart, screentone, high contrast"
-            else:
-                return f"{base_prompt}, anime style, vibrant, cel shading, studio quality"
+            return base_prompt + STYLE_SUFFIXES.get(self.style, STYLE_SUFFIXES["color_anime"])
         
         # Inject character DNA into prompt
         # Strategy: Base description + character-specific tags
-        dna_injection = ", ".join(set(", ".join(char_tags).split(", ")))  # Deduplicate tags
-        enhanced = f"{base_prompt}, {dna_injection}"
-        
-        return enhanced
+        return f"{base_prompt}, {', '.join(dna_tags)}"
     
     def register_characters_from_plan(self, chapter_plan: Dict) -> None:
         """Register all characters from a Story Director chapter plan."""
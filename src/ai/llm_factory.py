@@ -18,8 +18,9 @@ Usage:
 
 import os
 import time
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, AsyncIterator
 
 
 class LLMProvider(ABC):
@@ -40,6 +41,41 @@ class LLMProvider(ABC):
     def name(self) -> str:
         """Provider name for logging."""
         pass
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Async generate - runs the blocking SDK call in a worker thread."""
+        return await asyncio.to_thread(self.generate, prompt, **kwargs)
+    
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Yield response text chunks. Non-streaming providers yield the full text once."""
+        yield self.generate(prompt, **kwargs)
+    
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Async iterate stream() chunks, pulling each one in a worker thread."""
+        it = self.stream(prompt, **kwargs)
+        done = object()
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, it, done)
+                if chunk is done:
+                    break
+                yield chunk
+        finally:
+            it.close()
+    
+    async def agenerate_many(self, prompts: List[str], concurrency: int = 8, **kwargs) -> List[str]:
+        """
+        Generate for several prompts concurrently, preserving order.
+        
+        Concurrency is capped so a large batch doesn't trip provider rate limits.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _one(p: str) -> str:
+            async with semaphore:
+                return await self.agenerate(p, **kwargs)
+        
+        return await asyncio.gather(*(_one(p) for p in prompts))
 
 
 class GroqProvider(LLMProvider):
@@ -86,6 +122,32 @@ class GroqProvider(LLMProvider):
             if "rate" in error_msg or "limit" in error_msg or "429" in error_msg:
                 raise RateLimitError(f"Groq rate limit hit: {e}")
             raise RuntimeError(f"Groq generation failed: {e}")
+    
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        if not self.is_available():
+            raise ValueError("Groq API key not configured")
+        
+        try:
+            from groq import Groq
+            if self.client is None:
+                self.client = Groq(api_key=self.api_key)
+            
+            response = self.client.chat.completions.create(
+                model=kwargs.get("model", self.model),
+                messages=[{"role": "user", "content": prompt}],
+                temperature=kwargs.get("temperature", 0.7),
+                max_tokens=kwargs.get("max_tokens", 4096),
+                stream=True,
+            )
+            for chunk in response:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        except Exception as e:
+            error_msg = str(e).lower()
+            if "rate" in error_msg or "limit" in error_msg or "429" in error_msg:
+                raise RateLimitError(f"Groq rate limit hit: {e}")
+            raise RuntimeError(f"Groq generation failed: {e}")
 
 
 class NVIDIANIMProvider(LLMProvider):
@@ -298,6 +360,39 @@ class FallbackLLM(LLMProvider):
         raise RuntimeError(
             f"All LLM providers failed!\n" + "\n".join(errors)
         )
+    
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Stream with fallback - only switches provider before the first chunk."""
+        
+        errors = []
+        
+        for provider in self.providers:
+            started = False
+            try:
+                print(f"🤖 Streaming: {provider.name}")
+                for chunk in provider.stream(prompt, **kwargs):
+                    started = True
+                    yield chunk
+                return
+                
+            except RateLimitError as e:
+                if started:
+                    raise
+                print(f"⚠️ {provider.name} rate limited, trying next...")
+                errors.append(f"{provider.name}: {e}")
+                time.sleep(1)
+                continue
+                
+            except Exception as e:
+                if started:
+                    raise
+                print(f"❌ {provider.name} failed: {e}")
+                errors.append(f"{provider.name}: {e}")
+                continue
+        
+        raise RuntimeError(
+            f"All LLM providers failed!\n" + "\n".join(errors)
+        )
 
 
 class LLMFactory:
@@ -24,6 +24,64 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 
+# Identical for every job and sent first, so providers with automatic prefix
+# caching (Groq, Gemini 2.5) only bill the per-job tail as fresh input
+BLUEPRINT_SYSTEM_PROMPT = """You are a MASTER MANGA STORY ARCHITECT. Create a complete STORY BLUEPRINT.
+
+## REQUIREMENTS
+- Each chapter should be 3-5 pages worth of content
+- Create a complete story arc with beginning, middle, and end
+- BUT leave room for potential continuation beyond these chapters
+
+## YOUR TASK
+Create a comprehensive story blueprint that will guide all future page generation.
+
+## OUTPUT FORMAT (JSON only, no markdown)
+{
+  "title": "Manga Title",
+  "genre": "action/romance/fantasy/sci-fi/horror/slice-of-life",
+  "overall_arc": "2-3 sentence description of the complete story journey",
+  "theme": "Core theme or message of the story",
+  
+  "characters": [
+    {
+      "id": "char_001",
+      "name": "Character Name",
+      "appearance": "DETAILED visual description for consistent image generation - hair color/style, eye color, clothing, distinguishing features",
+      "personality": "Key personality traits",
+      "role": "protagonist/antagonist/mentor/sidekick/rival",
+      "arc": "How this character changes through the story"
+    }
+  ],
+  
+  "world_details": {
+    "setting": "Where the story takes place",
+    "time_period": "When (modern, future, fantasy era, etc)",
+    "atmosphere": "Overall mood/tone",
+    "key_locations": ["Location 1", "Location 2", "Location 3"],
+    "visual_style": "The visual style given below"
+  },
+  
+  "chapter_outlines": [
+    {
+      "chapter": 1,
+      "title": "Chapter Title",
+      "summary": "What happens in this chapter (3-4 sentences)",
+      "key_events": ["Event 1", "Event 2", "Event 3"],
+      "emotional_arc": "How emotions progress (e.g., 'hopeful to desperate to determined')",
+      "cliffhanger": "How this chapter ends to hook readers",
+      "estimated_pages": 4
+    }
+  ],
+  
+  "continuation_hooks": [
+    "Potential future story thread 1",
+    "Potential future story thread 2"
+  ]
+}
+"""
+
+
 class StoryDirector:
     """
     Intelligent story planning with FallbackLLM.
@@ -825,66 +883,16 @@ Return ONLY the enhanced prompt (2-4 sentences), no explanation."""
             for c in characters
         ]) if characters else "Create main characters based on the story."
         
-        prompt = f"""You are a MASTER MANGA STORY ARCHITECT. Create a complete STORY BLUEPRINT.
-
+        prompt = BLUEPRINT_SYSTEM_PROMPT + f"""
 ## USER'S STORY CONCEPT
 {story_prompt}
 
 ## USER-PROVIDED CHARACTERS
 {char_info}
 
-## REQUIREMENTS
+## PLAN
 - Plan for approximately {estimated_chapters} chapters
-- Each chapter should be 3-5 pages worth of content
-- Create a complete story arc with beginning, middle, and end
-- BUT leave room for potential continuation beyond these chapters
-
-## YOUR TASK
-Create a comprehensive story blueprint that will guide all future page generation.
-
-## OUTPUT FORMAT (JSON only, no markdown)
-{{
-  "title": "Manga Title",
-  "genre": "action/romance/fantasy/sci-fi/horror/slice-of-life",
-  "overall_arc": "2-3 sentence description of the complete story journey",
-  "theme": "Core theme or message of the story",
-  
-  "characters": [
-    {{
-      "id": "char_001",
-      "name": "Character Name",
-      "appearance": "DETAILED visual description for consistent image generation - hair color/style, eye color, clothing, distinguishing features",
-      "personality": "Key personality traits",
-      "role": "protagonist/antagonist/mentor/sidekick/rival",
-      "arc": "How this character changes through the story"
-    }}
-  ],
-  
-  "world_details": {{
-    "setting": "Where the story takes place",
-    "time_period": "When (modern, future, fantasy era, etc)",
-    "atmosphere": "Overall mood/tone",
-    "key_locations": ["Location 1", "Location 2", "Location 3"],
-    "visual_style": "{style}"
-  }},
-  
-  "chapter_outlines": [
-    {{
-      "chapter": 1,
-      "title": "Chapter Title",
-      "summary": "What happens in this chapter (3-4 sentences)",
-      "key_events": ["Event 1", "Event 2", "Event 3"],
-      "emotional_arc": "How emotions progress (e.g., 'hopeful to desperate to determined')",
-      "cliffhanger": "How this chapter ends to hook readers",
-      "estimated_pages": 4
-    }}
-  ],
-  
-  "continuation_hooks": [
-    "Potential future story thread 1",
-    "Potential future story thread 2"
-  ]
-}}"""
+- Visual style: {style}"""
 
         content = self.llm.generate(prompt, max_tokens=4000)
         
@@ -902,8 +910,9 @@ Create a comprehensive story blueprint that will guide all future page generatio
             # Ensure required fields exist
             if "characters" not in blueprint:
                 blueprint["characters"] = characters
-            if "world_details" not in blueprint:
-                blueprint["world_details"] = {"visual_style": style}
+            if not isinstance(blueprint.get("world_details"), dict):
+                blueprint["world_details"] = {}
+            blueprint["world_details"]["visual_style"] = style
             if "chapter_outlines" not in blueprint:
                 blueprint["chapter_outlines"] = []
             
@@ -99,8 +99,16 @@ class Database:
                 cls.sync_db = None
             
             # Create indexes for performance
+            # Dashboard lists sort by created_at/updated_at - a descending index
+            # turns the in-memory SORT into a bounded index scan
             await cls.db.projects.create_index("user_id")
             await cls.db.projects.create_index("job_id")
+            await cls.db.projects.create_index([("created_at", -1)])
+            await cls.db.projects.create_index([("user_id", 1), ("updated_at", -1)])
+            await cls.db.jobs.create_index("job_id")
+            await cls.db.jobs.create_index([("created_at", -1)])
+            await cls.db.jobs.create_index([("user_id", 1), ("created_at", -1)])
+            await cls.db.job_archive.create_index("job_id", unique=True)
             
         except Exception as e:
             print(f"⚠️ MongoDB connection failed: {e}")
@@ -239,6 +247,35 @@ class Database:
                 print(f"⚠️ Failed to get job from DB: {e}")
         return None
     
+    @classmethod
+    async def archive_job_status(cls, job_id: str, job_status: dict):
+        """
+        Archive a finished job's status.
+        
+        Kept out of the jobs collection so failed/evicted jobs never show up
+        as saved projects on the dashboard.
+        """
+        if cls.db is not None:
+            try:
+                await cls.db.job_archive.update_one(
+                    {"job_id": job_id},
+                    {"$set": {"job_status": job_status}},
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"⚠️ Failed to archive job: {e}")
+    
+    @classmethod
+    async def get_archived_job_status(cls, job_id: str) -> Optional[dict]:
+        """Get an archived job's status, or None."""
+        if cls.db is not None:
+            try:
+                doc = await cls.db.job_archive.find_one({"job_id": job_id}, {"job_status": 1})
+                return doc.get("job_status") if doc else None
+            except Exception as e:
+                print(f"⚠️ Failed to get archived job: {e}")
+        return None
+    
     # ============================================
     # Project Methods (for saved user projects)
     # ============================================
@@ -314,6 +351,51 @@ class Database:
             print(f"⚠️ Failed to get project: {e}")
             return None
     
+    @classmethod
+    async def get_project_for_continuation(cls, job_id: str, tail_pages: int = 3) -> Optional[dict]:
+        """
+        Get just what a chapter continuation needs.
+        
+        Only the last few pages come back (plus page_count), so long chapters
+        don't ship their whole pages array over the wire.
+        """
+        if cls.db is None:
+            return None
+        
+        try:
+            return await cls.db.projects.find_one(
+                {"job_id": job_id},
+                {
+                    "_id": 0,
+                    "title": 1,
+                    "style": 1,
+                    "story_prompt": 1,
+                    "characters": 1,
+                    "blueprint": 1,
+                    "story_state": 1,
+                    "config": 1,
+                    "image_provider": 1,
+                    "pages": {"$slice": -tail_pages},
+                    "page_count": {"$size": {"$ifNull": ["$pages", []]}},
+                }
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to get project: {e}")
+            return None
+    
+    @classmethod
+    async def get_project_pages(cls, job_id: str) -> List[dict]:
+        """Get only a project's pages array."""
+        if cls.db is None:
+            return []
+        
+        try:
+            project = await cls.db.projects.find_one({"job_id": job_id}, {"pages": 1, "_id": 0})
+            return project.get("pages", []) if project else []
+        except Exception as e:
+            print(f"⚠️ Failed to get project pages: {e}")
+            return []
+    
     @classmethod
     async def get_projects_for_user(cls, user_id: str, limit: int = 20) -> List[dict]:
         """Get all projects for a user (for dashboard)."""
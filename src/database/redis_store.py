@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Redis Job Store
+Shares job status across uvicorn workers so any worker can serve any job.
+
+Optional: only active when REDIS_URL is set and the redis package is installed.
+Otherwise the API keeps using its in-process jobs dict.
+"""
+
+from typing import Optional
+import os
+
+
+class RedisJobStore:
+    """Redis-backed mirror of the in-memory job table."""
+
+    client = None
+    KEY_PREFIX = "job:"
+    TTL_SECONDS = 7 * 24 * 3600  # Keep finished jobs around for a week
+
+    @classmethod
+    async def connect(cls):
+        """Connect to Redis if REDIS_URL is configured."""
+        redis_url = os.getenv("REDIS_URL")
+        if not redis_url:
+            return
+
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            print("⚠️ REDIS_URL set but redis not installed. Run: pip install redis[hiredis]")
+            return
+
+        try:
+            cls.client = redis.from_url(redis_url)
+            await cls.client.ping()
+            print("✅ Connected to Redis job store")
+        except Exception as e:
+            print(f"⚠️ Redis connection failed (using in-memory jobs only): {e}")
+            cls.client = None
+
+    @classmethod
+    async def close(cls):
+        """Close the Redis connection."""
+        if cls.client is not None:
+            await cls.client.aclose()
+            cls.client = None
+
+    @classmethod
+    async def get(cls, job_id: str) -> Optional[bytes]:
+        """Get a job's serialized status, or None."""
+        if cls.client is None:
+            return None
+
+        try:
+            return await cls.client.get(f"{cls.KEY_PREFIX}{job_id}")
+        except Exception as e:
+            print(f"⚠️ Failed to get job from Redis: {e}")
+            return None
+
+    @classmethod
+    async def set(cls, job_id: str, data: str):
+        """Store a job's serialized status."""
+        if cls.client is None:
+            return
+
+        try:
+            await cls.client.set(f"{cls.KEY_PREFIX}{job_id}", data, ex=cls.TTL_SECONDS)
+        except Exception as e:
+            print(f"⚠️ Failed to save job to Redis: {e}")
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+MangaGen - PDF Page Renderer
+
+Draws editor dialogue bubbles (speech, thought, shout, whisper, narrator)
+onto finished page images for PDF export.
+
+Kept free of FastAPI/app imports so ProcessPoolExecutor workers can import
+it cheaply and render pages in parallel.
+"""
+
+import textwrap
+from functools import lru_cache
+from io import BytesIO
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+@lru_cache(maxsize=32)
+def get_bubble_font(size: int = 14):
+    """Load the bubble font once per size and process, shared across bubbles."""
+    # Try to load a font, fallback to default
+    for font_path in ("arial.ttf", "C:/Windows/Fonts/arial.ttf"):
+        try:
+            return ImageFont.truetype(font_path, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size)  # Scalable default on Pillow >= 10.1
+    except TypeError:
+        return ImageFont.load_default()
+
+
+# Editor font sizes are in canvas pixels; page images are roughly twice that scale
+FONT_SCALE = 2
+DEFAULT_FONT_SIZE = 11
+
+# Manga-style short dialogue lines
+WRAP_WIDTH = 25
+
+
+def wrap_dialogue(text: str) -> str:
+    """Word-wrap bubble text to WRAP_WIDTH characters per line."""
+    return "\n".join(textwrap.wrap(text, WRAP_WIDTH, break_long_words=False, break_on_hyphens=False))
+
+
+# Shout bubble geometry: 14 spikes starting at 12 o'clock, even indices are outer spikes
+SHOUT_SPIKES = 14  # More spikes for aggressive look
+SHOUT_ANGLES = np.deg2rad(np.arange(SHOUT_SPIKES) * 360 / SHOUT_SPIKES - 90)
+SHOUT_COS = np.cos(SHOUT_ANGLES)
+SHOUT_SIN = np.sin(SHOUT_ANGLES)
+SHOUT_OUTER = np.arange(SHOUT_SPIKES) % 2 == 0
+
+# Whisper bubble dashes: (cos a1, sin a1, cos a2, sin a2) for every other of 24 segments
+DASH_COUNT = 24
+DASH_A1 = np.deg2rad(np.arange(0, DASH_COUNT, 2) * 360 / DASH_COUNT)
+DASH_A2 = np.deg2rad((np.arange(0, DASH_COUNT, 2) + 0.6) * 360 / DASH_COUNT)
+DASH_UNIT = np.stack([np.cos(DASH_A1), np.sin(DASH_A1), np.cos(DASH_A2), np.sin(DASH_A2)], axis=1)
+
+# Thought bubble cloud bumps every 60 degrees
+THOUGHT_BUMP_ANGLES = np.deg2rad(np.arange(0, 360, 60))
+THOUGHT_BUMP_COS = np.cos(THOUGHT_BUMP_ANGLES)
+THOUGHT_BUMP_SIN = np.sin(THOUGHT_BUMP_ANGLES)
+
+
+# Per-process scratch buffer for page encoding (render_page runs one page at a time per worker)
+_ENCODE_BUFFER = BytesIO()
+
+
+def render_page(
+    page_idx: int,
+    page: dict,
+    bubble_data: dict,
+    lossless: bool = False,
+    jpeg_quality: int = 90,
+    target_size: Optional[Tuple[int, int]] = None,
+    grid: Tuple[int, int] = (2, 2)
+) -> Optional[bytes]:
+    """
+    Render one page with its dialogue bubbles.
+    
+    Args:
+        page_idx: Index of the page in the export (fallback page number)
+        page: Page dict with page_image, page_number and panels
+        bubble_data: Editor dialogues keyed by (page_num, panel_idx)
+        lossless: Encode as PNG instead of JPEG
+        jpeg_quality: JPEG quality when not lossless
+        target_size: (width, height) in pixels to downsample to before encoding
+        grid: (cols, rows) of the page's panel layout
+    
+    Returns:
+        Encoded image bytes, or None if the page has no image
+        (callers filter out missing files beforehand)
+    """
+    page_image_path = page.get("page_image", "")
+    if not page_image_path:
+        return None
+    
+    # Load and optionally render dialogues (one Draw context for the whole page)
+    img = Image.open(page_image_path)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB")  # B/W pages are stored 1-bit; bubbles need color
+    draw = ImageDraw.Draw(img)
+    
+    # Panel grid: title area at the top, margins around panels, gutters between them
+    cols, rows = grid
+    title_height = int(img.height * 0.05)
+    margin = int(img.width * 0.02)
+    gutter = int(img.width * 0.01)
+    panel_w = (img.width - 2 * margin - (cols - 1) * gutter) // cols
+    panel_h = (img.height - title_height - 2 * margin - (rows - 1) * gutter) // rows
+    
+    # Get dialogues for this page's panels
+    page_num = page.get("page_number", page_idx + 1)
+    panel_ids = [(page_num, panel_idx) for panel_idx in range(cols * rows)]
+    
+    # Sample every shout bubble's spike jitter in one batched draw
+    shout_count = sum(
+        1
+        for panel_id in panel_ids
+        for bubble in bubble_data.get(panel_id, [])
+        if bubble.get("style") == "shout" and bubble.get("text")
+    )
+    shout_jitter = np.random.randint(-5, 6, (shout_count, SHOUT_SPIKES, 2))
+    shout_idx = 0
+    
+    for panel_idx, panel_id in enumerate(panel_ids):
+        panel_dialogues = bubble_data.get(panel_id, [])
+        
+        if panel_dialogues:
+            # Panel region on the page
+            panel_x = margin + (panel_idx % cols) * (panel_w + gutter)
+            panel_y = title_height + margin + (panel_idx // cols) * (panel_h + gutter)
+            
+            for bubble in panel_dialogues:
+                text = bubble.get("text", "")
+                style = bubble.get("style", "speech")
+                
+                if not text:
+                    continue
+                
+                text = wrap_dialogue(text)
+                try:
+                    font_size = int(bubble.get("fontSize", DEFAULT_FONT_SIZE))
+                except (TypeError, ValueError):
+                    font_size = DEFAULT_FONT_SIZE
+                font = get_bubble_font(font_size * FONT_SCALE)
+                
+                # Get text size
+                text_bbox = draw.multiline_textbbox((0, 0), text, font=font)
+                tw = text_bbox[2] - text_bbox[0]
+                th = text_bbox[3] - text_bbox[1]
+                
+                # Bubble position (x/y are percentages within the panel), clamped inside it
+                padding = 10
+                bubble_width = tw + padding * 2
+                bubble_height = th + padding * 2
+                bubble_x = panel_x + int((bubble.get("x", 10) / 100) * panel_w)
+                bubble_y = panel_y + int((bubble.get("y", 10) / 100) * panel_h)
+                bubble_x = max(panel_x, min(bubble_x, panel_x + panel_w - bubble_width))
+                bubble_y = max(panel_y, min(bubble_y, panel_y + panel_h - bubble_height))
+                bx = bubble_x + padding
+                by = bubble_y + padding
+                
+                # Draw bubble based on style - JJK-STYLE MATCHING CANVAS!
+                
+                if style == "narrator":
+                    # Dark box with left accent (matches canvas)
+                    draw.rectangle([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
+                                  fill=(30, 30, 35))
+                    draw.rectangle([bubble_x, bubble_y, bubble_x + 4, bubble_y + bubble_height], 
+                                  fill=(100, 100, 120))
+                    draw.multiline_text((bx + 4, by), text, fill="white", font=font)
+                    
+                elif style == "thought":
+                    # Cloud-like with bumps + thought trail
+                    # Main ellipse
+                    draw.ellipse([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
+                                fill="white", outline="gray", width=2)
+                    # Cloud bumps
+                    cx = bubble_x + bubble_width // 2
+                    cy = bubble_y + bubble_height // 2
+                    bump_size = min(bubble_width, bubble_height) // 4
+                    bump_xs = cx + ((bubble_width//2 - bump_size//3) * THOUGHT_BUMP_COS).astype(int)
+                    bump_ys = cy + ((bubble_height//2 - bump_size//3) * THOUGHT_BUMP_SIN).astype(int)
+                    for bpx, bpy in zip(bump_xs.tolist(), bump_ys.tolist()):
+                        draw.ellipse([bpx - bump_size//2, bpy - bump_size//2, 
+                                    bpx + bump_size//2, bpy + bump_size//2], 
+                                    fill="white", outline="gray", width=1)
+                    # Thought trail
+                    draw.ellipse([bubble_x + 5, bubble_y + bubble_height + 2, 
+                                 bubble_x + 12, bubble_y + bubble_height + 9], fill="white", outline="gray", width=1)
+                    draw.ellipse([bubble_x, bubble_y + bubble_height + 10, 
+                                 bubble_x + 6, bubble_y + bubble_height + 16], fill="white", outline="gray", width=1)
+                    draw.multiline_text((bx, by), text, fill="gray", font=font)
+                    
+                elif style == "shout":
+                    # AGGRESSIVE JJK-style SPIKY polygon! (MAINSTREAM QUALITY)
+                    cx = bubble_x + bubble_width // 2
+                    cy = bubble_y + bubble_height // 2
+                    # Outer spikes are DEEP and RANDOMIZED, inner notches dip inward
+                    r_x = np.where(SHOUT_OUTER, bubble_width // 2 + 25, bubble_width // 2 - 12)
+                    r_y = np.where(SHOUT_OUTER, bubble_height // 2 + 25, bubble_height // 2 - 12)
+                    jitter = np.where(SHOUT_OUTER[:, None], shout_jitter[shout_idx], 0)
+                    shout_idx += 1
+                    r_x = r_x + jitter[:, 0]
+                    r_y = r_y + jitter[:, 1]
+                    points = np.stack([
+                        cx + (r_x * SHOUT_COS).astype(int),
+                        cy + (r_y * SHOUT_SIN).astype(int)
+                    ], axis=1).ravel().tolist()
+                    draw.polygon(points, fill="white", outline="black", width=4)  # Thicker outline
+                    draw.multiline_text((bx, by), text, fill="black", font=font)
+                    
+                elif style == "whisper":
+                    # Dashed ellipse border
+                    # White fill first
+                    draw.ellipse([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
+                                fill="white", outline=None)
+                    # Dashed border using line segments (unit-circle dashes scaled to the bubble)
+                    cx = bubble_x + bubble_width // 2
+                    cy = bubble_y + bubble_height // 2
+                    radii = np.array([bubble_width // 2, bubble_height // 2] * 2)
+                    segs = (DASH_UNIT * radii).astype(int) + np.array([cx, cy, cx, cy])
+                    for x1, y1, x2, y2 in segs.tolist():
+                        draw.line([(x1, y1), (x2, y2)], fill="gray", width=1)
+                    draw.multiline_text((bx, by), text, fill="gray", font=font)
+                    
+                else:
+                    # Regular speech bubble - clean ellipse
+                    draw.ellipse([bubble_x, bubble_y, bubble_x + bubble_width, bubble_y + bubble_height], 
+                                fill="white", outline="black", width=2)
+                    draw.multiline_text((bx, by), text, fill="black", font=font)
+                    
+                    # Directional tail based on speaker_position
+                    speaker_pos = bubble.get("speakerPosition", bubble.get("speaker_position", "center"))
+                    bubble_cx = bx + tw // 2
+                    bubble_cy = by + th // 2
+                    
+                    if speaker_pos == "left":
+                        draw.polygon([
+                            (bubble_x, bubble_cy - 5),
+                            (bubble_x - 12, bubble_cy + 5),
+                            (bubble_x, bubble_cy + 5)
+                        ], fill="white", outline="black")
+                    elif speaker_pos == "right":
+                        draw.polygon([
+                            (bubble_x + bubble_width, bubble_cy - 5),
+                            (bubble_x + bubble_width + 12, bubble_cy + 5),
+                            (bubble_x + bubble_width, bubble_cy + 5)
+                        ], fill="white", outline="black")
+                    else:
+                        draw.polygon([
+                            (bubble_cx, bubble_y + bubble_height),
+                            (bubble_cx + 10, bubble_y + bubble_height + 15),
+                            (bubble_cx - 5, bubble_y + bubble_height)
+                        ], fill="white", outline="black")
+    
+    # Downsample after overlays so bubble positions stay in source-pixel space
+    if target_size and img.width > target_size[0]:
+        img = img.resize(target_size, Image.LANCZOS)
+    
+    # Reuse this worker's encode buffer instead of allocating one per page
+    img_buffer = _ENCODE_BUFFER
+    img_buffer.seek(0)
+    img_buffer.truncate()
+    if lossless:
+        img.save(img_buffer, format="PNG")
+    else:
+        # JPEG encodes several times faster than PNG and is far smaller inside a PDF
+        img.convert("RGB").save(img_buffer, format="JPEG", quality=jpeg_quality,
+                                optimize=False, progressive=False)
+    return img_buffer.getvalue()
@@ -4,11 +4,11 @@ Health monitoring and system status
 Track API health, resource usage, queue status
 """
 
+import os
 import psutil
 import time
 from datetime import datetime
-from typing import Dict, Any
-from pathlib import Path
+from typing import Dict, Any, Tuple
 
 class HealthMonitor:
     """Monitor system health and resources."""
@@ -31,8 +31,7 @@ class HealthMonitor:
         uptime_str = self._format_uptime(uptime_seconds)
         
         # Disk space for outputs
-        output_dir = Path("outputs")
-        output_size = sum(f.stat().st_size for f in output_dir.rglob('*') if f.is_file()) if output_dir.exists() else 0
+        output_size, output_files = self._scan_outputs("outputs")
         output_size_mb = output_size / (1024 * 1024)
         
         return {
@@ -55,10 +54,34 @@ class HealthMonitor:
             },
             "storage": {
                 "output_size_mb": round(output_size_mb, 2),
-                "output_files": sum(1 for _ in output_dir.rglob('*') if output_dir.exists() else 0)
+                "output_files": output_files
             }
         }
     
+    def _scan_outputs(self, root: str) -> Tuple[int, int]:
+        """
+        Total size and file count under root in one walk.
+        
+        os.scandir gets the file type from readdir, so only regular files
+        need a stat() for their size - no separate exists()/is_file() calls.
+        """
+        total_size = 0
+        file_count = 0
+        pending = [root]
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total_size += entry.stat(follow_symlinks=False).st_size
+                        file_count += 1
+        return total_size, file_count
+    
     def increment_request(self):
         """Increment request counter."""
         self.request_count += 1